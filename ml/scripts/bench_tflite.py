@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Latency/throughput benchmark for exported .tflite models (board_kp, dart_tip).
+
+Sweeps interpreter threads and input sizes, writes a JSON report and can fail
+when latency regresses against a previous report.
+"""
+import argparse
+import hashlib
+import json
+import time
+from pathlib import Path
+
+try:
+    import numpy as np
+except Exception as exc:
+    raise SystemExit("numpy missing. Install with: pip install numpy") from exc
+
+from run_metrics import peak_rss_mb
+from tflite_utils import import_tf, make_interpreter, quantize_input
+from validate_board_kp import load_image
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Benchmark TFLite invoke/preprocess latency")
+    p.add_argument("--model", required=True, help="Path to a .tflite model")
+    p.add_argument("--image", default=None, help="Image for real preprocessing (default: synthetic input)")
+    p.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4], help="num_threads values to sweep")
+    p.add_argument("--sizes", type=int, nargs="+", default=None, help="Square input sizes (default: model native)")
+    p.add_argument("--warmup", type=int, default=10)
+    p.add_argument("--runs", type=int, default=100)
+    p.add_argument("--out", default=None, help="JSON report path (default: <model>.bench.json)")
+    p.add_argument("--baseline", default=None, help="Previous JSON report to compare against")
+    p.add_argument("--max-regression", type=float, default=0.10, help="Allowed relative latency increase")
+    p.add_argument("--metric", choices=["p50", "p90", "p99"], default="p50", help="Latency metric for the check")
+    return p.parse_args(argv)
+
+
+def summarize_ms(samples):
+    arr = np.asarray(samples) * 1000.0
+    return {
+        "mean": float(arr.mean()),
+        "p50": float(np.percentile(arr, 50)),
+        "p90": float(np.percentile(arr, 90)),
+        "p99": float(np.percentile(arr, 99)),
+    }
+
+
+def open_interpreter(model_path, threads, size):
+    interpreter = import_tf().lite.Interpreter(model_path=str(model_path), num_threads=threads)
+    detail = interpreter.get_input_details()[0]
+    if size and (detail["shape"][1] != size or detail["shape"][2] != size):
+        shape = list(detail["shape"])
+        shape[1], shape[2] = size, size
+        interpreter.resize_tensor_input(detail["index"], shape, strict=False)
+    interpreter.allocate_tensors()
+    return interpreter
+
+
+def bench_config(args, threads, size):
+    interpreter = open_interpreter(args.model, threads, size)
+    detail = interpreter.get_input_details()[0]
+    shape = [int(v) for v in detail["shape"]]
+
+    pre_times = []
+    if args.image:
+        for _ in range(max(1, args.runs // 10)):
+            t0 = time.perf_counter()
+            x, _ = load_image(args.image, shape[1])
+            x = quantize_input(x, detail)
+            pre_times.append(time.perf_counter() - t0)
+    else:
+        rng = np.random.default_rng(0)
+        x = quantize_input(rng.random(shape, dtype=np.float32), detail)
+
+    for _ in range(args.warmup):
+        interpreter.set_tensor(detail["index"], x)
+        interpreter.invoke()
+
+    invoke_times = []
+    for _ in range(args.runs):
+        interpreter.set_tensor(detail["index"], x)
+        t0 = time.perf_counter()
+        interpreter.invoke()
+        invoke_times.append(time.perf_counter() - t0)
+
+    result = {
+        "threads": threads,
+        "size": shape[1],
+        "input_dtype": np.dtype(detail["dtype"]).name,
+        "invoke_ms": summarize_ms(invoke_times),
+        "throughput_ips": len(invoke_times) / sum(invoke_times),
+    }
+    if pre_times:
+        result["preprocess_ms"] = summarize_ms(pre_times)
+    return result
+
+
+def check_regressions(results, baseline, metric, max_regression):
+    base = {(r["threads"], r["size"]): r for r in baseline.get("results", [])}
+    failures = []
+    for r in results:
+        prev = base.get((r["threads"], r["size"]))
+        if not prev:
+            continue
+        old = prev["invoke_ms"][metric]
+        new = r["invoke_ms"][metric]
+        if old > 0 and new > old * (1 + max_regression):
+            failures.append(f"threads={r['threads']} size={r['size']}: {metric} {old:.2f} -> {new:.2f} ms")
+    return failures
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    model_path = Path(args.model)
+    with open(model_path, "rb") as f:
+        model_bytes = f.read()
+
+    native = make_interpreter(model_path=str(model_path)).get_input_details()[0]["shape"]
+    sizes = args.sizes or [int(native[1])]
+
+    results = []
+    for size in sizes:
+        for threads in args.threads:
+            try:
+                r = bench_config(args, threads, size)
+            except (RuntimeError, ValueError) as exc:
+                print(f"size={size} threads={threads}: skipped ({exc})")
+                continue
+            results.append(r)
+            pre = r.get("preprocess_ms", {}).get("p50")
+            pre_txt = f" pre p50 {pre:.2f} ms" if pre is not None else ""
+            print(
+                f"size={r['size']:4d} threads={threads:2d} invoke p50 {r['invoke_ms']['p50']:.2f} "
+                f"p90 {r['invoke_ms']['p90']:.2f} p99 {r['invoke_ms']['p99']:.2f} ms{pre_txt}"
+            )
+
+    report = {
+        "model": model_path.name,
+        "sha1": hashlib.sha1(model_bytes).hexdigest(),
+        "size_bytes": len(model_bytes),
+        "tf": import_tf().__version__,
+        "warmup": args.warmup,
+        "runs": args.runs,
+        "results": results,
+        # Process-wide high-water mark over all configs (not per config)
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    out_path = Path(args.out) if args.out else model_path.with_suffix(".bench.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report: {out_path} (peak RSS {report['peak_rss_mb']:.0f} MB)")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        failures = check_regressions(results, baseline, args.metric, args.max_regression)
+        if failures:
+            print(f"Latency regression > {args.max_regression:.0%} vs {args.baseline}:")
+            for line in failures:
+                print(f"  {line}")
+            raise SystemExit(1)
+        print(f"No latency regression vs {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
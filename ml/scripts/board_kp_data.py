@@ -0,0 +1,97 @@
+"""Board keypoint dataset listing shared by the training, packing and validation scripts.
+
+Only NumPy and the label cache: everything here runs before (or without)
+TensorFlow, so the CLIs can parse arguments and list samples cheaply.
+"""
+import hashlib
+import json
+from pathlib import Path
+
+try:
+    import numpy as np
+except Exception as exc:
+    raise SystemExit("numpy missing. Install with: pip install numpy") from exc
+
+from dataset_exclude import is_excluded
+from label_cache import value_labels
+
+ORDER = ["20_top", "6_right", "3_bottom", "11_left"]
+PACK_FILE = "pack.json"
+
+
+def list_samples(images_dir: Path, labels_dir: Path, excluded=frozenset()):
+    # All 8-float labels at once from the columnar cache (see label_cache.py)
+    keys, values = value_labels(labels_dir, 8)
+    rows = dict(zip(keys.tolist(), values.tolist()))
+    samples = []
+    # rglob so sharded split dirs (images/train/shard_000/...) are picked up too
+    for img_path in images_dir.rglob("*"):
+        if img_path.suffix.lower() not in [".jpg", ".jpeg", ".png", ".webp"]:
+            continue
+        values = rows.get(img_path.relative_to(images_dir).with_suffix("").as_posix())
+        if values is not None and not is_excluded(img_path, excluded):
+            samples.append((str(img_path), values))
+    return samples
+
+
+def find_split_dirs(root: Path, split: str):
+    # Format A: root/images/split, root/labels/split
+    img_a = root / "images" / split
+    lbl_a = root / "labels" / split
+    if img_a.exists() and lbl_a.exists():
+        return img_a, lbl_a
+    # Format B: root/split/images, root/split/labels (Roboflow)
+    img_b = root / split / "images"
+    lbl_b = root / split / "labels"
+    if img_b.exists() and lbl_b.exists():
+        return img_b, lbl_b
+    return None, None
+
+
+def parse_data_spec(spec):
+    """'root' or 'root:weight' -> (Path, weight)."""
+    root, sep, weight = spec.rpartition(":")
+    if sep:
+        try:
+            return Path(root), float(weight)
+        except ValueError:
+            pass
+    return Path(spec), 1.0
+
+
+def samples_fingerprint(samples, img_size):
+    h = hashlib.sha1(f"img={img_size}".encode("utf-8"))
+    for path, values in samples:
+        st = Path(path).stat()
+        h.update(f"{path}|{st.st_size}|{st.st_mtime_ns}|{values}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def load_pack_meta(root: Path):
+    path = root / PACK_FILE
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_packed_split(root: Path, meta, split, excluded=frozenset()):
+    """[(images, labels, rows)]; rows maps label rows to image rows when excluded drops some, else None."""
+    info = meta["splits"].get(split)
+    if not info:
+        return []
+    shards = []
+    for shard in info["shards"]:
+        images = np.load(root / split / shard["images"], mmap_mode="r")
+        labels = np.load(root / split / shard["labels"])
+        rows = None
+        if excluded:
+            # paths_<n>.txt lists the source image of every packed row
+            paths_file = root / split / f"paths_{shard['images'][len('images_') : -len('.npy')]}.txt"
+            with open(paths_file, "r", encoding="utf-8") as f:
+                keep = [i for i, line in enumerate(f) if not is_excluded(line.rstrip("\n"), excluded)]
+            if len(keep) < len(labels):
+                rows = np.asarray(keep, dtype=np.int64)
+                labels = labels[rows]
+        shards.append((images, labels, rows))
+    return shards
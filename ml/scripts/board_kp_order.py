@@ -0,0 +1,84 @@
+"""Calibration-point ordering for export_board_kp_from_yolo.py (NumPy).
+
+Kept out of the CLI module so `ml.py export-kp-yolo --help` does not load
+NumPy (see ml.py).
+"""
+import itertools
+import math
+
+try:
+    import numpy as np
+except Exception as exc:
+    raise SystemExit("numpy missing. Install with: pip install numpy") from exc
+
+
+TARGET_ANGLES = [
+    -math.pi / 2,  # top (20)
+    0.0,           # right (6)
+    math.pi / 2,   # bottom (3)
+    math.pi,       # left (11)
+]
+TIE_TOL = 1e-9
+PERMS = np.array(list(itertools.permutations(range(4))), dtype=np.intp)
+
+
+def ang_diff(a, b):
+    diff = np.mod(a - b + math.pi, 2 * math.pi) - math.pi
+    return np.abs(diff)
+
+
+def order_points_batch(points):
+    """Order the calibration points of N images at once.
+
+    points: float array (N, K, 2) with K >= 4 candidates per image. Every
+    4-point subset is scored against all 24 target assignments; returns the
+    best (N, 4, 2) in TARGET_ANGLES order. Assignments whose costs differ by
+    at most TIE_TOL are tied; the first permutation in itertools order wins.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    combos = np.array(list(itertools.combinations(range(points.shape[1]), 4)), dtype=np.intp)
+    sel = points[:, combos]  # (N, C, 4, 2)
+    cx = (sel[..., 0, 0] + sel[..., 1, 0] + sel[..., 2, 0] + sel[..., 3, 0]) / 4
+    cy = (sel[..., 0, 1] + sel[..., 1, 1] + sel[..., 2, 1] + sel[..., 3, 1]) / 4
+    dy = sel[..., 1] - cy[..., None]
+    dx = sel[..., 0] - cx[..., None]
+    angles = np.arctan2(dy, dx)  # (N, C, 4)
+    # cost[n, c, j, i]: point j of subset c placed at target i
+    cost = ang_diff(angles[..., :, None], np.asarray(TARGET_ANGLES)[None, :])
+    perm_cost = cost[..., PERMS[:, 0], 0]
+    for i in range(1, 4):
+        perm_cost = perm_cost + cost[..., PERMS[:, i], i]  # (N, C, 24)
+    flat = perm_cost.reshape(len(points), -1)
+    # Costs within TIE_TOL count as equal and the first in (subset, permutation)
+    # order wins, so last-ulp differences between atan2 builds cannot flip a pick
+    near_best = flat <= flat.min(axis=1, keepdims=True) + TIE_TOL
+    best = np.argmax(near_best, axis=1)
+    best_combo = combos[best // len(PERMS)]  # (N, 4)
+    best_perm = PERMS[best % len(PERMS)]  # (N, 4)
+    idx = np.take_along_axis(best_combo, best_perm, axis=1)
+    return np.take_along_axis(points, idx[..., None], axis=1)
+
+
+def order_points(points):
+    # points: list of (x,y)
+    return [tuple(p) for p in order_points_batch([points])[0].tolist()]
+
+
+def order_parsed(parsed, max_candidates=8, batch_size=4096):
+    """Order every image with >= 4 points; returns {index: [(x, y)] * 4}."""
+    groups = {}
+    for i, points in enumerate(parsed):
+        if len(points) < 4:
+            continue
+        k = min(len(points), max(4, max_candidates))
+        groups.setdefault(k, []).append(i)
+
+    ordered = {}
+    for k, idxs in groups.items():
+        # Bounded batches: K > 4 scores C(K, 4) * 24 assignments per image
+        for start in range(0, len(idxs), batch_size):
+            chunk = idxs[start : start + batch_size]
+            result = order_points_batch([parsed[i][:k] for i in chunk])
+            for i, points in zip(chunk, result.tolist()):
+                ordered[i] = points
+    return ordered
@@ -0,0 +1,767 @@
+"""Board keypoint training with TensorFlow: tf.data pipelines, callbacks, model, export.
+
+train_board_kp.py parses the arguments and imports this module only
+afterwards, so `--help` and usage errors never load TensorFlow.
+"""
+import datetime as dt
+import hashlib
+import itertools
+import json
+import math
+import os
+from pathlib import Path
+import random
+import sys
+import time
+
+try:
+    import numpy as np
+    import tensorflow as tf
+except Exception as exc:
+    raise SystemExit("tensorflow missing. Install with: pip install tensorflow") from exc
+
+from board_kp_data import (
+    ORDER,
+    find_split_dirs,
+    list_samples,
+    load_pack_meta,
+    load_packed_split,
+    parse_data_spec,
+    samples_fingerprint,
+)
+from board_score import score_accuracy
+from cpu_training import (
+    configure_cpu,
+    make_strategy,
+)
+from dataset_exclude import load_excluded
+from run_metrics import INPUT_BOUND_SHARE, RunMetrics, ms_stats, parse_steps, probe_input
+from tflite_utils import convert_saved_model, io_meta, make_interpreter, run_interpreter
+from train_board_kp import PRETRAINED_ALPHAS
+
+
+def sample_dataset(samples, img_size, seed, training):
+    """Decoded (image, label) elements, unbatched."""
+    paths = [s[0] for s in samples]
+    labels = [s[1] for s in samples]
+    ds = tf.data.Dataset.from_tensor_slices((paths, labels))
+    if training:
+        ds = ds.shuffle(buffer_size=len(paths), seed=seed, reshuffle_each_iteration=True)
+
+    def _load(path, label):
+        data = tf.io.read_file(path)
+        img = tf.image.decode_image(data, channels=3, expand_animations=False)
+        img = tf.image.convert_image_dtype(img, tf.float32)
+        img = tf.image.resize(img, [img_size, img_size], method=tf.image.ResizeMethod.BILINEAR)
+        return img, tf.cast(label, tf.float32)
+
+    return ds.map(_load, num_parallel_calls=tf.data.AUTOTUNE)
+
+
+def build_dataset(samples, img_size, batch, seed, training):
+    return finish_dataset(sample_dataset(samples, img_size, seed, training), batch, training)
+
+
+def finish_dataset(ds, batch, training, drop_remainder=False):
+    if training:
+        # Photometric augmentation only (no geometry) to keep labels valid
+        aug = tf.keras.Sequential(
+            [
+                tf.keras.layers.RandomBrightness(0.1),
+                tf.keras.layers.RandomContrast(0.1),
+            ]
+        )
+        ds = ds.map(lambda x, y: (aug(x, training=True), y), num_parallel_calls=tf.data.AUTOTUNE)
+
+    ds = ds.batch(batch, drop_remainder=drop_remainder).prefetch(tf.data.AUTOTUNE)
+    return ds
+
+
+class InputMeter:
+    """Counts samples and bytes handed to tf.data by the packed stream."""
+
+    def __init__(self):
+        self.samples = 0
+        self.bytes = 0
+
+
+def packed_sample_dataset(shards, img_size, seed, training, meter=None):
+    # Streams pre-decoded uint8 rows straight from the memory-mapped shards
+    rng = np.random.default_rng(seed)
+    total = sum(len(labels) for _, labels, _ in shards)
+
+    def _gen():
+        order = rng.permutation(len(shards)) if training else range(len(shards))
+        for shard_idx in order:
+            images, labels, rows = shards[shard_idx]
+            order_rows = rng.permutation(len(labels)) if training else range(len(labels))
+            for i in order_rows:
+                img = np.asarray(images[i if rows is None else rows[i]])
+                if meter is not None:
+                    meter.samples += 1
+                    meter.bytes += img.nbytes
+                yield img, labels[i]
+
+    ds = tf.data.Dataset.from_generator(
+        _gen,
+        output_signature=(
+            tf.TensorSpec(shape=(img_size, img_size, 3), dtype=tf.uint8),
+            tf.TensorSpec(shape=(8,), dtype=tf.float32),
+        ),
+    )
+    ds = ds.apply(tf.data.experimental.assert_cardinality(total))
+    if training:
+        # Mix rows across shard boundaries
+        ds = ds.shuffle(buffer_size=min(total, 2048), seed=seed, reshuffle_each_iteration=True)
+    return ds.map(
+        lambda img, label: (tf.image.convert_image_dtype(img, tf.float32), label),
+        num_parallel_calls=tf.data.AUTOTUNE,
+    )
+
+
+def build_packed_dataset(shards, img_size, batch, seed, training, meter=None):
+    return finish_dataset(packed_sample_dataset(shards, img_size, seed, training, meter), batch, training)
+
+
+class ThroughputLogger(tf.keras.callbacks.Callback):
+    """Logs epoch wall time and training samples/sec (and bytes/sec for packed data)."""
+
+    def __init__(self, batch, meter=None):
+        super().__init__()
+        self.batch = batch
+        self.meter = meter
+        self.epochs = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._start = time.perf_counter()
+        self._steps = 0
+        if self.meter is not None:
+            self._samples0 = self.meter.samples
+            self._bytes0 = self.meter.bytes
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._steps += 1
+
+    def on_epoch_end(self, epoch, logs=None):
+        elapsed = max(time.perf_counter() - self._start, 1e-9)
+        if self.meter is not None:
+            samples = self.meter.samples - self._samples0
+            nbytes = self.meter.bytes - self._bytes0
+        else:
+            samples = self._steps * self.batch
+            nbytes = None
+        line = f"epoch {epoch + 1}: {elapsed:.1f}s, {samples / elapsed:.1f} samples/s"
+        self.epochs.append({"seconds": elapsed, "samples_per_sec": samples / elapsed})
+        if logs is not None:
+            logs["epoch_seconds"] = elapsed
+            logs["samples_per_sec"] = samples / elapsed
+        if nbytes is not None:
+            line += f", {nbytes / elapsed / 1e6:.1f} MB/s input"
+            if logs is not None:
+                logs["input_bytes_per_sec"] = nbytes / elapsed
+        print(line)
+
+
+class ValidationPass(tf.keras.callbacks.Callback):
+    """Runs the epoch's single val pass and logs val_loss, val_mae and val_score_acc.
+
+    Replaces fit(validation_data=...): one prediction pass feeds both the
+    Keras metrics and the score accuracy (share of board probes scored like
+    the label keypoints, see board_score.py). It runs before the checkpoint
+    and early-stopping callbacks, which read val_mae from the same logs.
+    val_sets maps source name -> batched val dataset; with several sources
+    val_<name>_mae and val_<name>_score_acc are logged as well.
+    """
+
+    def __init__(self, val_sets):
+        super().__init__()
+        self.val_sets = val_sets
+        self._predict = None
+
+    def on_train_begin(self, logs=None):
+        model = self.model
+        self._predict = tf.function(lambda x: model(x, training=False), reduce_retracing=True)
+
+    def on_epoch_end(self, epoch, logs=None):
+        results = {}
+        for name, ds in self.val_sets.items():
+            preds, labels = [], []
+            for x, y in ds:
+                preds.append(self._predict(x).numpy())
+                labels.append(y.numpy())
+            if preds:
+                results[name] = (np.concatenate(preds), np.concatenate(labels))
+        if not results:
+            return
+        preds = np.concatenate([p for p, _ in results.values()]).astype(np.float32)
+        labels = np.concatenate([y for _, y in results.values()])
+        metrics = {
+            "val_loss": float(self.model.loss(labels, preds)),
+            "val_mae": float(np.mean(np.abs(preds - labels))),
+            "val_score_acc": score_accuracy(preds, labels),
+        }
+        if len(self.val_sets) > 1:
+            for name, (p, y) in results.items():
+                metrics[f"val_{name}_mae"] = float(np.mean(np.abs(p - y)))
+                metrics[f"val_{name}_score_acc"] = score_accuracy(p, y)
+        if logs is not None:
+            logs.update(metrics)
+        print(f"epoch {epoch + 1}: " + ", ".join(f"{k} {v:.4f}" for k, v in metrics.items()))
+
+
+class StepTimer(tf.keras.callbacks.Callback):
+    """Wall time of each train step (input fetch + compute) and the host gap between steps."""
+
+    def __init__(self):
+        super().__init__()
+        self.steps = []
+        self.gaps = []
+        self.first_steps = []
+        self._last_end = None
+
+    def on_train_begin(self, logs=None):
+        self._first = True
+        self._last_end = None
+
+    def on_train_batch_begin(self, batch, logs=None):
+        self._begin = time.perf_counter()
+        if self._last_end is not None:
+            self.gaps.append(self._begin - self._last_end)
+
+    def on_train_batch_end(self, batch, logs=None):
+        end = time.perf_counter()
+        # The first step of each fit() includes tracing/compilation
+        (self.first_steps if self._first else self.steps).append(end - self._begin)
+        self._first = False
+        self._last_end = end
+
+    def on_epoch_end(self, epoch, logs=None):
+        # Validation runs between epochs; not a train-loop gap
+        self._last_end = None
+
+    def summary(self, input_stats=None):
+        step = ms_stats(self.steps)
+        out = {
+            "step": step,
+            "host_gap": ms_stats(self.gaps),
+            "first_step_ms": [s * 1000 for s in self.first_steps],
+            "input": input_stats,
+        }
+        if step and input_stats:
+            share = input_stats["mean_ms"] / step["mean_ms"]
+            out["input_share"] = share
+            out["bound"] = "input" if share >= INPUT_BOUND_SHARE else "compute"
+        return out
+
+
+class ProfileWindow(tf.keras.callbacks.Callback):
+    """Runs the TF profiler for global train steps [start, stop) across fit() calls."""
+
+    def __init__(self, start, stop, logdir):
+        super().__init__()
+        self.start = start
+        self.stop = stop
+        self.logdir = str(logdir)
+        self.step = 0
+        self.active = False
+        self.captured = None
+
+    def on_train_batch_begin(self, batch, logs=None):
+        if self.step == self.start and self.captured is None:
+            tf.profiler.experimental.start(self.logdir)
+            self.active = True
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.step += 1
+        if self.active and self.step >= self.stop:
+            self._finish()
+
+    def on_train_end(self, logs=None):
+        if self.active:
+            self._finish()
+
+    def _finish(self):
+        tf.profiler.experimental.stop()
+        self.active = False
+        self.captured = [self.start, self.step]
+        print(f"Profiler trace (steps {self.start}-{self.step}): {self.logdir}")
+
+
+class DataSource:
+    """Raw (export_board_kp.py) or packed (pack_board_kp.py) dataset root."""
+
+    def __init__(self, root: Path, img_size, excluded=frozenset()):
+        self.root = root
+        self.img_size = img_size
+        self.excluded = excluded
+        self.pack_meta = load_pack_meta(root)
+        self._samples = {}
+        self._shards = {}
+        if self.pack_meta and self.pack_meta["img"] != img_size:
+            raise SystemExit(f"Packed dataset is {self.pack_meta['img']}px; pass --img {self.pack_meta['img']} or re-pack")
+
+    @property
+    def packed(self):
+        return self.pack_meta is not None
+
+    def samples(self, split):
+        if split not in self._samples:
+            img_dir, lbl_dir = find_split_dirs(self.root, split)
+            if split == "val" and (not img_dir or not lbl_dir):
+                img_dir, lbl_dir = find_split_dirs(self.root, "valid")
+            self._samples[split] = list_samples(img_dir, lbl_dir, self.excluded) if img_dir and lbl_dir else []
+        return self._samples[split]
+
+    def shards(self, split):
+        if split not in self._shards:
+            self._shards[split] = load_packed_split(self.root, self.pack_meta, split, self.excluded)
+        return self._shards[split]
+
+    def count(self, split):
+        if self.packed:
+            return sum(len(labels) for _, labels, _ in self.shards(split))
+        return len(self.samples(split))
+
+    def fingerprint(self, split):
+        if self.packed:
+            fingerprint = self.pack_meta["splits"].get(split, {}).get("fingerprint")
+            kept = [None if rows is None else rows.tolist() for _, _, rows in self.shards(split)]
+            if fingerprint and any(rows is not None for rows in kept):
+                # Rows dropped by --exclude change what the packed split yields
+                fingerprint = hashlib.sha1(f"{fingerprint}|{kept}".encode("utf-8")).hexdigest()
+            return fingerprint
+        return samples_fingerprint(self.samples(split), self.img_size)
+
+    def elements(self, split, seed, training, meter=None):
+        if self.packed:
+            return packed_sample_dataset(self.shards(split), self.img_size, seed, training, meter=meter)
+        return sample_dataset(self.samples(split), self.img_size, seed, training)
+
+    def dataset(self, split, batch, seed, training, meter=None):
+        return finish_dataset(self.elements(split, seed, training, meter), batch, training)
+
+
+def source_names(sources):
+    """Short unique names (root dir names) for per-source metrics."""
+    names = []
+    for source in sources:
+        name = source.root.name or "data"
+        base, i = name, 2
+        while name in names:
+            name = f"{base}_{i}"
+            i += 1
+        names.append(name)
+    return names
+
+
+def mix_datasets(parts, weights, counts, batch, seed):
+    """Weighted on-the-fly interleave of per-source (already shuffled) element datasets.
+
+    Sources are repeated and drawn by weight; an epoch is sum(counts) samples,
+    so weights rebalance sources without a merged copy. Returns (unbatched
+    dataset, steps_per_epoch); a single source keeps the plain single-pass
+    epoch (steps_per_epoch None).
+    """
+    if len(parts) == 1:
+        return parts[0], None
+    total = float(sum(weights))
+    ds = tf.data.Dataset.sample_from_datasets(
+        [part.repeat() for part in parts],
+        weights=[w / total for w in weights],
+        seed=seed,
+    )
+    return ds, math.ceil(sum(counts) / batch)
+
+
+def backbone_config(alpha=1.0):
+    """MobileNetV3Small settings for a width multiplier.
+
+    Keras ships ImageNet weights for the minimalistic variant only at alpha 1.0
+    and for the full variant (hard-swish, squeeze-excite) at 0.75 and 1.0, so
+    0.75 also changes the block type.
+    """
+    if alpha not in PRETRAINED_ALPHAS:
+        raise ValueError(f"No ImageNet weights for alpha {alpha}; use one of {sorted(PRETRAINED_ALPHAS)}")
+    return {"alpha": alpha, "minimalistic": PRETRAINED_ALPHAS[alpha], "weights": "imagenet"}
+
+
+def build_model(img_size, alpha=1.0, pretrained=True):
+    inputs = tf.keras.Input(shape=(img_size, img_size, 3))
+    config = backbone_config(alpha)
+    if not pretrained:
+        config["weights"] = None
+    base = tf.keras.applications.MobileNetV3Small(
+        input_shape=(img_size, img_size, 3),
+        include_top=False,
+        **config,
+    )
+    base.trainable = False
+    x = base(inputs, training=False)
+    x = tf.keras.layers.GlobalAveragePooling2D(name="gap")(x)
+    outputs = head_layers(x)
+    model = tf.keras.Model(inputs, outputs)
+    return model
+
+
+def head_layers(x):
+    x = tf.keras.layers.Dense(128, activation="relu", name="head_dense")(x)
+    x = tf.keras.layers.Dropout(0.2, name="head_dropout")(x)
+    # float32 output keeps the loss stable under mixed_bfloat16
+    return tf.keras.layers.Dense(8, activation="sigmoid", name="kp_out", dtype="float32")(x)
+
+
+def build_head(feat_dim):
+    inputs = tf.keras.Input(shape=(feat_dim,))
+    return tf.keras.Model(inputs, head_layers(inputs))
+
+
+def get_backbone(model):
+    return next(layer for layer in model.layers if isinstance(layer, tf.keras.Model))
+
+
+def float32_copy(model, img_size, alpha=1.0):
+    """Rebuild the model under the float32 policy, outside any strategy, for export."""
+    tf.keras.mixed_precision.set_global_policy("float32")
+    # No ImageNet weights: they would be overwritten right away (and need the network)
+    clone = build_model(img_size, alpha, pretrained=False)
+    clone.set_weights(model.get_weights())
+    return clone
+
+
+def compile_model(model, lr, huber_delta=0.02, jit_compile=False):
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate=lr),
+        loss=tf.keras.losses.Huber(delta=huber_delta),
+        metrics=[tf.keras.metrics.MeanAbsoluteError(name="mae")],
+        jit_compile=jit_compile,
+    )
+
+
+def feature_cache_key(source: DataSource, img_size, alpha=1.0):
+    config = {
+        "backbone": "MobileNetV3Small",
+        **backbone_config(alpha),
+        "pool": "gap",
+        "img": img_size,
+        "packed": source.packed,
+        "precision": tf.keras.mixed_precision.global_policy().name,
+        "tf": tf.__version__,
+        "train": source.fingerprint("train"),
+        "val": source.fingerprint("val"),
+    }
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def load_or_extract_features(model, source: DataSource, split, cache_dir: Path, batch):
+    feat_path = cache_dir / f"{split}_features.npy"
+    label_path = cache_dir / f"{split}_labels.npy"
+    if feat_path.exists() and label_path.exists():
+        return np.load(feat_path), np.load(label_path)
+
+    extractor = tf.keras.Model(model.input, model.get_layer("gap").output)
+    feats, labels = [], []
+    for x, y in source.dataset(split, batch, seed=0, training=False):
+        feats.append(extractor(x, training=False).numpy())
+        labels.append(y.numpy())
+    feats = np.concatenate(feats).astype(np.float32)
+    labels = np.concatenate(labels).astype(np.float32)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for path, arr in [(feat_path, feats), (label_path, labels)]:
+        # Per-process temp name: parallel sweep trials may fill the same cache
+        tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npy")
+        np.save(tmp_path, arr)
+        os.replace(tmp_path, path)
+    return feats, labels
+
+
+def train_cached_head(model, sources, weights, args, cache_root: Path, strategy, metrics):
+    """Fit the Dense head on cached GAP embeddings and copy it into model."""
+    start = time.perf_counter()
+    train_parts, counts, val_parts = [], [], {}
+    for i, (name, source) in enumerate(zip(source_names(sources), sources)):
+        cache_dir = cache_root / feature_cache_key(source, args.img, args.alpha)
+        with metrics.stage("feature_cache"):
+            train_x, train_y = load_or_extract_features(model, source, "train", cache_dir, args.batch)
+            val_x, val_y = load_or_extract_features(model, source, "val", cache_dir, args.batch)
+        print(f"Embeddings {name}: {cache_dir}")
+        part = tf.data.Dataset.from_tensor_slices((train_x, train_y))
+        train_parts.append(part.shuffle(len(train_x), seed=args.seed + i, reshuffle_each_iteration=True))
+        counts.append(len(train_x))
+        val_parts[name] = tf.data.Dataset.from_tensor_slices((val_x, val_y))
+    print(f"Embeddings ready in {time.perf_counter() - start:.1f}s")
+
+    with strategy.scope():
+        head = build_head(int(train_parts[0].element_spec[0].shape[0]))
+        compile_model(head, args.lr, args.huber_delta, jit_compile=args.jit)
+    if args.init_weights:
+        for name in ["head_dense", "kp_out"]:
+            head.get_layer(name).set_weights(model.get_layer(name).get_weights())
+    train_ds, steps_per_epoch = mix_datasets(train_parts, weights, counts, args.batch, args.seed)
+    distributed = args.strategy != "none"
+    train_ds = train_ds.batch(args.batch, drop_remainder=distributed).prefetch(tf.data.AUTOTUNE)
+    val_sets = {name: part.batch(args.batch) for name, part in val_parts.items()}
+
+    start = time.perf_counter()
+    with metrics.stage("head_fit"):
+        history = head.fit(
+            train_ds,
+            epochs=args.epochs,
+            steps_per_epoch=steps_per_epoch,
+            callbacks=[
+                ValidationPass(val_sets),
+                tf.keras.callbacks.EarlyStopping(monitor="val_mae", patience=12, restore_best_weights=True),
+                ThroughputLogger(args.batch),
+            ],
+            verbose=args.verbose,
+        )
+    best_mae = min(history.history["val_mae"])
+    best_acc = history.history["val_score_acc"][int(np.argmin(history.history["val_mae"]))]
+    print(
+        f"Head trained in {time.perf_counter() - start:.1f}s, best val_mae {best_mae:.5f} "
+        f"(val_score_acc {best_acc:.4f})"
+    )
+
+    for name in ["head_dense", "kp_out"]:
+        model.get_layer(name).set_weights(head.get_layer(name).get_weights())
+    return best_mae
+
+
+def val_batches(sources):
+    """Yield (x, y) val samples one at a time, without holding the split in memory."""
+    for source in sources:
+        for x, y in source.dataset("val", 1, seed=0, training=False):
+            yield x.numpy(), y.numpy()[0]
+
+
+def tflite_val_metrics(model_content, sources):
+    """Return (MAE, score accuracy) of a converted model over the val split."""
+    interpreter = make_interpreter(model_content=model_content)
+    preds, ys = [], []
+    for x, y in val_batches(sources):
+        preds.append(run_interpreter(interpreter, x).reshape(-1)[:8])
+        ys.append(y)
+    preds, ys = np.stack(preds), np.asarray(ys, dtype=np.float32)
+    return float(np.mean(np.abs(preds - ys))), score_accuracy(preds, ys)
+
+
+def export_tflite_variants(saved_model_dir: Path, run_dir: Path, version, modes, sources, rep_samples, metrics):
+    """Write board_kp_{version}[_{mode}].tflite per mode and report size / MAE delta vs float32."""
+    # Only the int8 calibration set is kept in memory; evaluation streams the val split
+    with metrics.stage("rep_samples"):
+        rep_xs = [x for x, _ in itertools.islice(val_batches(sources), rep_samples)]
+
+    def representative_data():
+        for x in rep_xs:
+            yield [x.astype(np.float32)]
+
+    variants = {}
+    modes = ["none"] + [m for m in modes if m != "none"]
+    for mode in modes:
+        with metrics.stage(f"tflite_convert_{mode}"):
+            model_content = convert_saved_model(saved_model_dir, mode, representative_data)
+        suffix = "" if mode == "none" else f"_{mode}"
+        path = run_dir / f"board_kp_{version}{suffix}.tflite"
+        with open(path, "wb") as f:
+            f.write(model_content)
+        info = io_meta(make_interpreter(model_content=model_content))
+        info["file"] = path.name
+        info["size_bytes"] = len(model_content)
+        with metrics.stage(f"tflite_eval_{mode}"):
+            info["val_mae"], info["val_score_acc"] = tflite_val_metrics(model_content, sources)
+        variants[mode] = info
+
+    base_mae = variants["none"]["val_mae"]
+    base_size = variants["none"]["size_bytes"]
+    print("TFLite variants (val MAE vs float32):")
+    for mode, info in variants.items():
+        info["mae_delta"] = info["val_mae"] - base_mae
+        print(
+            f"  {mode:8s} {info['size_bytes'] / 1e6:7.2f} MB ({info['size_bytes'] / base_size:5.1%}) "
+            f"mae {info['val_mae']:.5f} ({info['mae_delta']:+.5f}) score acc {info['val_score_acc']:.4f} "
+            f"input {info['input']['dtype']}"
+        )
+    return variants
+
+
+def train(args):
+    """Train, export and write meta.json / metrics.json for parsed train_board_kp.py args."""
+    metrics = RunMetrics()
+    profile_steps = parse_steps(args.profile_steps) if args.profile_steps else None
+    cpu_config = configure_cpu(args)
+    strategy = make_strategy(args)
+    random.seed(args.seed)
+    tf.random.set_seed(args.seed)
+    # Some environments have stdout flush issues; guard against them.
+    _real_flush = sys.stdout.flush
+    def _safe_flush():
+        try:
+            _real_flush()
+        except OSError:
+            pass
+    sys.stdout.flush = _safe_flush
+
+    specs = [parse_data_spec(spec) for spec in args.data]
+    weights = [weight for _, weight in specs]
+    if any(w <= 0 for w in weights):
+        raise SystemExit("Source weights must be > 0")
+    with metrics.stage("listing"):
+        excluded = load_excluded(args.exclude)
+        sources = [DataSource(root, args.img, excluded) for root, _ in specs]
+        names = source_names(sources)
+        for source in sources:
+            if not source.count("train"):
+                raise SystemExit(f"No training samples found in {source.root}")
+            if not source.count("val"):
+                raise SystemExit(f"No validation samples found in {source.root}")
+    if len(sources) > 1:
+        for name, source, weight in zip(names, sources, weights):
+            print(f"Source {name}: train {source.count('train')}, val {source.count('val')}, weight {weight:g}")
+
+    # Byte metering only when every source streams from packed shards
+    meter = InputMeter() if all(s.packed for s in sources) else None
+    with metrics.stage("dataset_build"):
+        train_parts = [s.elements("train", args.seed + i, training=True, meter=meter) for i, s in enumerate(sources)]
+        counts = [s.count("train") for s in sources]
+        train_ds, steps_per_epoch = mix_datasets(train_parts, weights, counts, args.batch, args.seed)
+        # Replicas cannot split a ragged last batch, so distributed runs drop it
+        distributed = args.strategy != "none"
+        train_ds = finish_dataset(train_ds, args.batch, training=True, drop_remainder=distributed)
+        val_parts = {name: s.elements("val", args.seed, training=False) for name, s in zip(names, sources)}
+        val_sets = {name: finish_dataset(part, args.batch, training=False) for name, part in val_parts.items()}
+
+    input_stats = None
+    # The image pipeline only feeds fit() when the backbone is trained
+    if args.input_probe_batches > 0 and (not args.cached_features or args.finetune_epochs > 0):
+        with metrics.stage("input_probe"):
+            input_stats = probe_input(train_ds, args.input_probe_batches)
+
+    with metrics.stage("model_build"), strategy.scope():
+        model = build_model(args.img, args.alpha)
+        compile_model(model, args.lr, args.huber_delta, jit_compile=args.jit)
+        if args.init_weights:
+            model.load_weights(args.init_weights)
+
+    out_root = Path(args.out)
+    version = args.version or dt.date.today().isoformat()
+    run_dir = out_root / f"{version}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    throughput = ThroughputLogger(args.batch, meter)
+    step_timer = StepTimer()
+    profiler = None
+    if profile_steps:
+        profile_dir = Path(args.profile_dir) if args.profile_dir else run_dir / "profile"
+        profiler = ProfileWindow(*profile_steps, profile_dir)
+
+    def make_callbacks(initial_best=None):
+        return [
+            ValidationPass(val_sets),
+            tf.keras.callbacks.ModelCheckpoint(
+                filepath=str(run_dir / "best.keras"),
+                monitor="val_mae",
+                save_best_only=True,
+                save_weights_only=False,
+                initial_value_threshold=initial_best,
+            ),
+            tf.keras.callbacks.EarlyStopping(monitor="val_mae", patience=12, restore_best_weights=True),
+            throughput,
+            step_timer,
+        ] + ([profiler] if profiler else [])
+
+    if args.cached_features:
+        cache_root = Path(args.cache_dir) if args.cache_dir else out_root / "feature_cache"
+        best_mae = train_cached_head(model, sources, weights, args, cache_root, strategy, metrics)
+        model.save(run_dir / "best.keras")
+        if args.finetune_epochs > 0:
+            # Phase 2: unfreeze the backbone (BatchNorm stays in inference mode)
+            get_backbone(model).trainable = True
+            with strategy.scope():
+                compile_model(model, args.finetune_lr, args.huber_delta, jit_compile=args.jit)
+            with metrics.stage("finetune_fit"):
+                history = model.fit(
+                    train_ds,
+                            epochs=args.finetune_epochs,
+                    steps_per_epoch=steps_per_epoch,
+                    callbacks=make_callbacks(initial_best=best_mae),
+                    verbose=args.verbose,
+                )
+            # EarlyStopping restores phase 2's own best; best.keras holds the overall best
+            finetune_mae = min(history.history["val_mae"])
+            if finetune_mae >= best_mae:
+                print(f"Fine-tuning did not beat the head (val_mae {finetune_mae:.5f}); exporting best.keras")
+                model.load_weights(run_dir / "best.keras")
+    else:
+        with metrics.stage("fit"):
+            model.fit(
+                train_ds,
+                    epochs=args.epochs,
+                steps_per_epoch=steps_per_epoch,
+                callbacks=make_callbacks(),
+                verbose=args.verbose,
+            )
+
+    if throughput.epochs:
+        secs = [e["seconds"] for e in throughput.epochs]
+        rates = [e["samples_per_sec"] for e in throughput.epochs]
+        cpu_config["epochs"] = throughput.epochs
+        cpu_config["mean_epoch_seconds"] = float(np.mean(secs))
+        cpu_config["mean_samples_per_sec"] = float(np.mean(rates))
+        print(
+            f"Throughput: {np.mean(rates):.1f} samples/s, {np.mean(secs):.1f}s/epoch "
+            f"(strategy {cpu_config['strategy']} x{cpu_config['replicas']}, {cpu_config['precision']}, "
+            f"jit {cpu_config['jit']}, threads {cpu_config['intra_op_threads']}/{cpu_config['inter_op_threads']})"
+        )
+    if cpu_config["precision"] != "float32" or args.strategy != "none":
+        model = float32_copy(model, args.img, args.alpha)
+
+    pipeline = step_timer.summary(input_stats)
+    if pipeline.get("bound"):
+        print(
+            f"Input pipeline: {pipeline['input']['mean_ms']:.1f} ms/batch alone vs "
+            f"{pipeline['step']['mean_ms']:.1f} ms/train step ({pipeline['input_share']:.0%}, {pipeline['bound']}-bound)"
+        )
+
+    # Save SavedModel (Keras 3 export)
+    saved_model_dir = run_dir / "saved_model"
+    with metrics.stage("export_saved_model"):
+        model.export(saved_model_dir)
+
+    # Export TFLite (float32 reference + requested quantized variants)
+    variants = export_tflite_variants(
+        saved_model_dir, run_dir, version, args.quantize, sources, args.rep_samples, metrics
+    )
+
+    meta = {
+        "version": version,
+        "order": ORDER,
+        "img": args.img,
+        "backbone": {"name": "MobileNetV3Small", **backbone_config(args.alpha)},
+        "output": "8 floats: x20 y20 x6 y6 x3 y3 x11 y11",
+        "data": [
+            {"root": str(s.root), "name": name, "weight": w, "train": s.count("train"), "val": s.count("val")}
+            for name, s, w in zip(names, sources, weights)
+        ],
+        "exclude": args.exclude,
+        "training": cpu_config,
+        "variants": variants,
+    }
+    with open(run_dir / "meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    metrics.data.update(
+        {
+            "run": version,
+            "args": vars(args),
+            "training": {k: v for k, v in cpu_config.items() if k != "epochs"},
+            "epochs": throughput.epochs,
+            "pipeline": pipeline,
+            "profile": {"steps": profiler.captured, "dir": profiler.logdir} if profiler else None,
+            "tflite_bytes": {mode: info["size_bytes"] for mode, info in variants.items()},
+        }
+    )
+    report = metrics.write(run_dir / "metrics.json")
+    print(f"Metrics: {run_dir / 'metrics.json'} ({report['total_seconds']:.1f}s, peak RSS {report['peak_rss_mb']:.0f} MB)")
+
+    for info in variants.values():
+        print(f"Saved: {run_dir / info['file']}")
+    print("Upload to: /var/www/html/models/")
@@ -0,0 +1,158 @@
+"""Cached board-mask / polar lookup tables keyed by calibration.
+
+Calibration rarely changes within a capture session, so the in-board mask
+and the pixel -> board polar (radius, angle) tables from diff_detect are
+computed once per quantized calibration + frame size + sample step and
+kept as memory-mapped .npy files. score_at() reads segment and ring of a
+point from the polar tables without solving the homography again. The cache directory is bounded by size
+and evicts least-recently-used entries (recency is the entry dir mtime, so
+several worker processes can share one cache).
+"""
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from board_score import score_board_points
+from diff_detect import BOARD_RADIUS_LIMIT, homography_for_settings, project_grid
+
+
+LUT_VERSION = 1
+
+
+def quantize_settings(settings, quantum):
+    """Round the geometry-relevant settings to a grid of `quantum` (normalized units)."""
+
+    def q(v):
+        return round(float(v) / quantum) * quantum
+
+    points = settings.get("calibrationPoints")
+    if points and len(points) == 4:
+        return {"calibrationPoints": [{"x": q(pt["x"]), "y": q(pt["y"])} for pt in points]}
+    return {
+        "centerX": q(settings["centerX"]),
+        "centerY": q(settings["centerY"]),
+        "scale": q(settings["scale"]),
+    }
+
+
+def compute_tables(settings, width, height, step):
+    """Return (mask, radius, angle) over the sampled grid; angle is radians, 0 = right, +pi/2 = 20."""
+    xs = np.arange(0, width, step)
+    ys = np.arange(0, height, step)
+    homography = homography_for_settings(settings, width, height)
+    if homography is not None:
+        u, v, valid = project_grid(homography, xs, ys)
+        radius = np.sqrt(u * u + v * v)
+        mask = valid & (radius <= BOARD_RADIUS_LIMIT)
+        radius = np.where(valid, radius, np.inf)
+        angle = np.where(valid, np.arctan2(v, u), 0.0)
+    else:
+        dx = xs[None, :] - settings["centerX"] * width
+        dy = settings["centerY"] * height - ys[:, None]
+        effective_radius = (min(width, height) / 2) * settings["scale"]
+        radius = np.sqrt(dx * dx + dy * dy) / effective_radius
+        mask = radius <= BOARD_RADIUS_LIMIT
+        angle = np.arctan2(dy, dx) + np.zeros_like(radius)
+    return mask, radius.astype(np.float32), angle.astype(np.float32)
+
+
+def score_at(tables, x, y, width, height, step, rotation_deg=0.0):
+    """Score normalized image point (x, y) at its nearest grid sample -> (segment, multiplier, points)."""
+    _, radius, angle = tables
+    row = min(max(int(round(y * height / step)), 0), radius.shape[0] - 1)
+    col = min(max(int(round(x * width / step)), 0), radius.shape[1] - 1)
+    r = float(radius[row, col])
+    if not np.isfinite(r):
+        return 0, 0, 0
+    a = float(angle[row, col])
+    score = score_board_points([r * np.cos(a), r * np.sin(a)], rotation_deg)
+    return int(score["segment"]), int(score["multiplier"]), int(score["points"])
+
+
+class BoardLutCache:
+    def __init__(self, root, max_bytes=512 * 1024 * 1024, quantum=1e-4):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.quantum = quantum
+        self.hits = 0
+        self.misses = 0
+        self._mem = OrderedDict()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def key(self, settings, width, height, step):
+        data = {
+            "v": LUT_VERSION,
+            "settings": quantize_settings(settings, self.quantum),
+            "size": [int(width), int(height)],
+            "step": int(step),
+        }
+        return hashlib.sha1(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()[:20]
+
+    def get(self, settings, width, height, step):
+        """Return memory-mapped (mask, radius, angle) for these settings."""
+        key = self.key(settings, width, height, step)
+        if key in self._mem:
+            self._mem.move_to_end(key)
+            self.hits += 1
+            return self._mem[key]
+
+        entry_dir = self.root / key
+        if not (entry_dir / "angle.npy").exists():
+            self.misses += 1
+            tables = compute_tables(quantize_settings(settings, self.quantum), width, height, step)
+            self._write(entry_dir, tables)
+            self._evict(keep=key)
+        else:
+            self.hits += 1
+            os.utime(entry_dir)
+
+        try:
+            tables = self._load(entry_dir)
+        except FileNotFoundError:
+            # Evicted by another process in the meantime
+            tables = compute_tables(quantize_settings(settings, self.quantum), width, height, step)
+            self._write(entry_dir, tables)
+            tables = self._load(entry_dir)
+        self._mem[key] = tables
+        while len(self._mem) > 64:
+            self._mem.popitem(last=False)
+        return tables
+
+    def _load(self, entry_dir: Path):
+        return tuple(np.load(entry_dir / f"{name}.npy", mmap_mode="r") for name in ["mask", "radius", "angle"])
+
+    def _write(self, entry_dir: Path, tables):
+        # Write into a private dir and rename, so concurrent workers never see partial entries
+        tmp_dir = self.root / f".tmp-{uuid.uuid4().hex}"
+        tmp_dir.mkdir()
+        for name, arr in zip(["mask", "radius", "angle"], tables):
+            np.save(tmp_dir / f"{name}.npy", arr)
+        try:
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # Another process won the race
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def _evict(self, keep):
+        entries = []
+        total = 0
+        for entry in self.root.iterdir():
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            size = sum(f.stat().st_size for f in entry.iterdir())
+            entries.append((entry.stat().st_mtime, entry, size))
+            total += size
+        for _, entry, size in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            if entry.name == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            self._mem.pop(entry.name, None)
+            total -= size
@@ -0,0 +1,144 @@
+"""Batched dartboard scoring from board keypoints (NumPy).
+
+Mirrors computeHit in CameraScoringView.native.tsx: the four keypoints
+(ORDER: 20 top, 6 right, 3 bottom, 11 left) define a homography onto the
+unit circle, and the projected tip is scored by angle and radius. All N
+homographies are solved in one batched np.linalg.solve.
+
+Board-keypoint labels carry no dart tips, so score_accuracy() defaults to a
+fixed set of probe points (one per segment and ring, plus both bulls) that are
+placed into each frame with the true keypoints and scored with the predicted
+ones.
+"""
+import numpy as np
+
+from diff_detect import UNIT_TARGETS
+
+
+BOARD_NUMBERS = np.array([20, 1, 18, 4, 13, 6, 10, 15, 2, 17, 3, 19, 7, 16, 8, 11, 14, 9, 12, 5])
+# Ring radii as in computeHit (normalized: 1.0 = outer edge of the double ring)
+BULLSEYE_R = 0.05
+BULL_R = 0.1
+TRIPLE_IN_R = 0.55
+TRIPLE_OUT_R = 0.65
+DOUBLE_IN_R = 0.9
+BOARD_R = 1.0
+
+
+def homographies(keypoints):
+    """keypoints (N, 8) -> (H (N, 3, 3), valid (N,)); singular layouts are marked invalid."""
+    kp = np.asarray(keypoints, dtype=np.float64).reshape(-1, 4, 2)
+    n = kp.shape[0]
+    x, y = kp[..., 0], kp[..., 1]
+    u = np.array([t[0] for t in UNIT_TARGETS])
+    v = np.array([t[1] for t in UNIT_TARGETS])
+
+    a = np.zeros((n, 8, 8))
+    a[:, 0::2, 0] = x
+    a[:, 0::2, 1] = y
+    a[:, 0::2, 2] = 1.0
+    a[:, 0::2, 6] = -u * x
+    a[:, 0::2, 7] = -u * y
+    a[:, 1::2, 3] = x
+    a[:, 1::2, 4] = y
+    a[:, 1::2, 5] = 1.0
+    a[:, 1::2, 6] = -v * x
+    a[:, 1::2, 7] = -v * y
+    b = np.empty((n, 8))
+    b[:, 0::2] = u
+    b[:, 1::2] = v
+
+    # Swap degenerate systems for identity so one bad frame cannot fail the batch
+    valid = np.abs(np.linalg.det(a)) > 1e-12
+    a[~valid] = np.eye(8)
+    h = np.linalg.solve(a, b[..., None])[..., 0]
+    out = np.concatenate([h, np.ones((n, 1))], axis=1).reshape(n, 3, 3)
+    return out, valid
+
+
+def project(h, points):
+    """Apply (N, 3, 3) homographies to points (N, K, 2); returns (projected, valid)."""
+    pts = np.asarray(points, dtype=np.float64)
+    x, y = pts[..., 0], pts[..., 1]
+    denom = h[:, None, 2, 0] * x + h[:, None, 2, 1] * y + h[:, None, 2, 2]
+    valid = np.abs(denom) >= 1e-12
+    safe = np.where(valid, denom, 1.0)
+    px = (h[:, None, 0, 0] * x + h[:, None, 0, 1] * y + h[:, None, 0, 2]) / safe
+    py = (h[:, None, 1, 0] * x + h[:, None, 1, 1] * y + h[:, None, 1, 2]) / safe
+    return np.stack([px, py], axis=-1), valid
+
+
+def score_board_points(board_xy, rotation_deg=0.0):
+    """Score points in board space (unit circle, +y = 20). Returns dict of int arrays.
+
+    segment: 1..20, 25 for bulls, 0 for a miss; multiplier: 0 (miss), 1, 2, 3; points.
+    """
+    xy = np.asarray(board_xy, dtype=np.float64)
+    dx, dy = xy[..., 0], xy[..., 1]
+    r = np.sqrt(dx * dx + dy * dy)
+    deg = np.degrees(np.arctan2(dy, dx))
+    # np.fmod keeps JS % semantics for negative values
+    normalized = np.fmod(90 - deg + rotation_deg + 360, 360)
+    index = np.mod(np.floor(normalized / 18).astype(np.int64), 20)
+    segment = BOARD_NUMBERS[index]
+
+    multiplier = np.select(
+        [r <= BULL_R, r <= TRIPLE_IN_R, r <= TRIPLE_OUT_R, r <= DOUBLE_IN_R, r <= BOARD_R],
+        [np.where(r <= BULLSEYE_R, 2, 1), 1, 3, 1, 2],
+        default=0,
+    )
+    segment = np.where(r <= BULL_R, 25, segment)
+    segment = np.where(r > BOARD_R, 0, segment)
+    points = segment * multiplier
+    return {"segment": segment, "multiplier": multiplier, "points": points}
+
+
+def score_frames(keypoints, tips, rotation_deg=0.0):
+    """Score tips (N, 2) or (N, K, 2) in the image frame of each keypoint set (N, 8)."""
+    tips = np.asarray(tips, dtype=np.float64)
+    single = tips.ndim == 2
+    if single:
+        tips = tips[:, None, :]
+    h, valid_h = homographies(keypoints)
+    board, valid_p = project(h, tips)
+    result = score_board_points(board, rotation_deg)
+    invalid = ~(valid_h[:, None] & valid_p)
+    for key in result:
+        result[key] = np.where(invalid, 0, result[key])
+    if single:
+        result = {k: v[:, 0] for k, v in result.items()}
+    return result
+
+
+def probe_points():
+    """Board-space probes: centre of every segment in each ring, plus both bulls."""
+    edges = [BULL_R, TRIPLE_IN_R, TRIPLE_OUT_R, DOUBLE_IN_R, BOARD_R]
+    radii = [(a + b) / 2 for a, b in zip(edges, edges[1:])]
+    # computeHit puts segment i at [18 * i, 18 * (i + 1)) degrees clockwise from the top
+    angles = np.radians(90 - (np.arange(20) * 18 + 9))
+    pts = [(r * np.cos(a), r * np.sin(a)) for r in radii for a in angles]
+    pts += [(0.0, 0.0), (0.0, (BULLSEYE_R + BULL_R) / 2)]
+    return np.array(pts)
+
+
+def probes_in_image(true_keypoints):
+    """Map probe_points() into each frame using the true keypoints -> (N, K, 2), valid (N,)."""
+    h, valid = homographies(true_keypoints)
+    inv = np.linalg.inv(np.where(valid[:, None, None], h, np.eye(3)))
+    probes = probe_points()
+    pts, valid_p = project(inv, np.broadcast_to(probes, (len(h),) + probes.shape))
+    return pts, valid & valid_p.all(axis=1)
+
+
+def score_accuracy(pred_keypoints, true_keypoints, tips=None):
+    """Fraction of tips (default: probes) whose segment and multiplier match under pred vs true keypoints."""
+    if tips is None:
+        tips, valid = probes_in_image(true_keypoints)
+    else:
+        tips = np.asarray(tips, dtype=np.float64)
+        valid = np.ones(len(tips), dtype=bool)
+    true = score_frames(true_keypoints, tips)
+    pred = score_frames(pred_keypoints, tips)
+    same = (true["segment"] == pred["segment"]) & (true["multiplier"] == pred["multiplier"])
+    same = same[valid]
+    return float(same.mean()) if same.size else float("nan")
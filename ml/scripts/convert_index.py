@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+import argparse
+import time
+
+from dataset_index import SHARD_SIZE, convert_index, shard_paths
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Convert app index.json into a sharded JSONL index")
+    p.add_argument("--index", required=True, help="Path to index.json (DatasetSample array)")
+    p.add_argument("--out", required=True, help="Output directory for shard-*.jsonl")
+    p.add_argument("--shard-size", type=int, default=SHARD_SIZE, help="Samples per shard")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+    count = convert_index(args.index, args.out, shard_size=args.shard_size)
+    elapsed = time.perf_counter() - start
+    print(f"Converted {count} samples into {len(shard_paths(args.out))} shards in {elapsed:.1f}s: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""CPU training knobs for train_board_kp.py: threads, XLA, bfloat16 and tf.distribute.
+
+Thread pools and logical CPU devices must be configured before TensorFlow
+runs its first op, so configure_cpu() is the first thing main() calls.
+--strategy mirrored splits the CPU into --replicas logical devices and runs
+MirroredStrategy over them (one process, each replica gets its own step).
+"""
+import os
+import sys
+
+from tflite_utils import import_tf
+
+
+PRECISIONS = ["float32", "bf16", "auto"]
+STRATEGIES = ["none", "mirrored"]
+
+
+def add_cpu_args(p):
+    p.add_argument("--jit", action="store_true", help="Compile train/eval steps with XLA (jit_compile)")
+    p.add_argument("--intra-op-threads", type=int, default=0, help="Threads per op (0 = TF default)")
+    p.add_argument("--inter-op-threads", type=int, default=0, help="Ops run in parallel (0 = TF default)")
+    p.add_argument(
+        "--precision",
+        choices=PRECISIONS,
+        default="float32",
+        help="bf16: mixed_bfloat16 policy; auto: bf16 only if the CPU has native bf16 (avx512_bf16/amx_bf16)",
+    )
+    p.add_argument("--strategy", choices=STRATEGIES, default="none", help="Data parallelism across CPU cores")
+    p.add_argument("--replicas", type=int, default=2, help="Logical CPU devices for --strategy mirrored")
+
+
+def cpu_supports_bf16():
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+
+def configure_cpu(args):
+    """Apply thread/device/precision settings; returns the effective config for meta.json."""
+    if args.jit and args.strategy == "mirrored":
+        # XLA clusters cannot reach variables on the other logical devices
+        raise SystemExit("--jit cannot be combined with --strategy mirrored")
+    tf = import_tf()
+    if args.intra_op_threads:
+        tf.config.threading.set_intra_op_parallelism_threads(args.intra_op_threads)
+    if args.inter_op_threads:
+        tf.config.threading.set_inter_op_parallelism_threads(args.inter_op_threads)
+    if args.strategy == "mirrored":
+        cpu = tf.config.list_physical_devices("CPU")[0]
+        tf.config.set_logical_device_configuration(
+            cpu, [tf.config.LogicalDeviceConfiguration() for _ in range(args.replicas)]
+        )
+
+    bf16 = args.precision == "bf16" or (args.precision == "auto" and cpu_supports_bf16())
+    if args.precision == "bf16" and not cpu_supports_bf16():
+        print("Warning: no native bf16 on this CPU; mixed_bfloat16 will likely be slower", file=sys.stderr)
+    if bf16:
+        tf.keras.mixed_precision.set_global_policy("mixed_bfloat16")
+
+    return {
+        "jit": args.jit,
+        "intra_op_threads": tf.config.threading.get_intra_op_parallelism_threads(),
+        "inter_op_threads": tf.config.threading.get_inter_op_parallelism_threads(),
+        "precision": "mixed_bfloat16" if bf16 else "float32",
+        "strategy": args.strategy,
+        "replicas": args.replicas if args.strategy != "none" else 1,
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def make_strategy(args):
+    tf = import_tf()
+    if args.strategy == "mirrored":
+        devices = [d.name for d in tf.config.list_logical_devices("CPU")]
+        return tf.distribute.MirroredStrategy(devices=devices)
+    return tf.distribute.get_strategy()
@@ -0,0 +1,35 @@
+"""Exclusion lists (dedup.json and friends) honored by the exporters.
+
+A list is a JSON file with an "exclude" array of image paths. Relative entries
+are resolved against the list's directory; all paths are compared after
+os.path.abspath, so no per-file filesystem calls are needed.
+"""
+import json
+import os
+from pathlib import Path
+
+
+def add_exclude_args(p):
+    p.add_argument(
+        "--exclude",
+        nargs="*",
+        default=[],
+        help="JSON lists with an 'exclude' array of image paths to skip (e.g. dedup.json)",
+    )
+
+
+def load_excluded(paths):
+    excluded = set()
+    for list_path in paths or []:
+        base = Path(list_path).resolve().parent
+        with open(list_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for entry in data.get("exclude") or []:
+            excluded.add(os.path.abspath(base / entry))
+    if paths:
+        print(f"Excluding {len(excluded)} images ({', '.join(str(p) for p in paths)})")
+    return frozenset(excluded)
+
+
+def is_excluded(path, excluded):
+    return bool(excluded) and os.path.abspath(path) in excluded
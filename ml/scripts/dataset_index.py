@@ -0,0 +1,180 @@
+"""Sharded JSONL dataset index with an append-only writer and streaming reader.
+
+Layout: <root>/shard-00000.jsonl, shard-00001.jsonl, ... with one
+DatasetSample JSON object per line. The writer only appends to the newest
+shard and starts a new one after `shard_size` lines, so adding a sample is
+one short write instead of rewriting index.json. iter_samples() accepts the
+shard directory, a single .jsonl file or a legacy index.json array and
+yields one sample at a time.
+"""
+import json
+import os
+import sys
+from pathlib import Path
+
+
+SHARD_PREFIX = "shard-"
+SHARD_SUFFIX = ".jsonl"
+SHARD_SIZE = 10000
+
+
+def shard_paths(root: Path):
+    return sorted(p for p in Path(root).glob(f"{SHARD_PREFIX}*{SHARD_SUFFIX}") if p.is_file())
+
+
+def shard_name(idx):
+    return f"{SHARD_PREFIX}{idx:05d}{SHARD_SUFFIX}"
+
+
+def _repair_tail(path: Path):
+    """Drop a partial last line left by an interrupted append; returns complete line count."""
+    with open(path, "rb+") as f:
+        lines = 0
+        last_newline = 0
+        offset = 0
+        while True:
+            chunk = f.read(1 << 20)
+            if not chunk:
+                break
+            lines += chunk.count(b"\n")
+            idx = chunk.rfind(b"\n")
+            if idx >= 0:
+                last_newline = offset + idx + 1
+            offset += len(chunk)
+        if last_newline != offset:
+            f.truncate(last_newline)
+    return lines
+
+
+class IndexWriter:
+    """Append DatasetSample dicts to a sharded index directory."""
+
+    def __init__(self, root, shard_size=SHARD_SIZE):
+        self.root = Path(root)
+        self.shard_size = shard_size
+        self.root.mkdir(parents=True, exist_ok=True)
+        shards = shard_paths(self.root)
+        if shards:
+            self._idx = int(shards[-1].name[len(SHARD_PREFIX) : -len(SHARD_SUFFIX)])
+            self._lines = _repair_tail(shards[-1])
+        else:
+            self._idx = 0
+            self._lines = 0
+        self._file = None
+
+    def _open(self):
+        if self._file is None or self._lines >= self.shard_size:
+            if self._file is not None:
+                self._file.close()
+                self._idx += 1
+                self._lines = 0
+            self._file = open(self.root / shard_name(self._idx), "a", encoding="utf-8")
+        return self._file
+
+    def append(self, sample):
+        f = self._open()
+        f.write(json.dumps(sample, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._lines += 1
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_jsonl(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # Only a crash mid-append can leave a broken line; skip it
+                print(f"Warning: skipping invalid JSON at {path}:{line_no}", file=sys.stderr)
+
+
+def iter_json_array(path: Path, chunk_size=1 << 20):
+    """Stream the elements of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf = ""
+        pos = 0
+        eof = False
+        started = False
+
+        def fill():
+            nonlocal buf, pos, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+            buf = buf[pos:] + chunk
+            pos = 0
+
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf):
+                if eof:
+                    raise ValueError(f"{path}: unexpected end of JSON array")
+                fill()
+                continue
+            if not started:
+                if buf[pos] != "[":
+                    raise ValueError(f"{path}: expected a JSON array")
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            if end == len(buf) and not eof:
+                # A scalar may continue in the next chunk
+                fill()
+                continue
+            pos = end
+            yield obj
+
+
+def iter_samples(path):
+    """Yield DatasetSample dicts from a shard directory, a .jsonl file or index.json."""
+    path = Path(path)
+    if path.is_dir():
+        for shard in shard_paths(path):
+            yield from iter_jsonl(shard)
+    elif path.suffix == SHARD_SUFFIX:
+        yield from iter_jsonl(path)
+    else:
+        yield from iter_json_array(path)
+
+
+def convert_index(index_path, out_root, shard_size=SHARD_SIZE):
+    """Convert a DatasetSample JSON array (or .jsonl) into a sharded index; returns the sample count."""
+    out_root = Path(out_root)
+    if shard_paths(out_root):
+        raise SystemExit(f"{out_root} already contains index shards")
+    count = 0
+    with IndexWriter(out_root, shard_size=shard_size) as writer:
+        for sample in iter_samples(index_path):
+            writer.append(sample)
+            count += 1
+    return count
@@ -0,0 +1,124 @@
+"""Image materialization for derived datasets (copy/hardlink/reflink/symlink).
+
+Derived datasets only change labels, so images can usually be linked to the
+source instead of copied. Unsupported modes fall back to a plain copy.
+With --max-side, larger images are instead downscaled and re-encoded; labels
+are normalized, so they stay valid unchanged.
+"""
+import os
+import shutil
+import sys
+from pathlib import Path
+
+
+LINK_MODES = ["copy", "hardlink", "reflink", "symlink"]
+
+# Linux FICLONE ioctl (btrfs, xfs with reflink=1, bcachefs, ...)
+_FICLONE = 0x40049409
+EXIF_ORIENTATION = 0x0112
+_warned = set()
+
+
+def add_link_args(p):
+    p.add_argument(
+        "--link-mode",
+        choices=LINK_MODES,
+        default="copy",
+        help="How images are materialized in the output (falls back to copy if unsupported)",
+    )
+
+
+def add_resize_args(p):
+    p.add_argument(
+        "--max-side",
+        type=int,
+        default=0,
+        help="Downscale images whose longer side exceeds this and re-encode them (0 = keep originals)",
+    )
+    p.add_argument("--quality", type=int, default=90, help="JPEG/WebP quality for re-encoded images")
+
+
+def _warn_fallback(mode, exc):
+    if mode in _warned:
+        return
+    _warned.add(mode)
+    print(f"link-mode {mode} not supported here ({exc}); falling back to copy", file=sys.stderr)
+
+
+def _reflink(src: Path, dst: Path):
+    import fcntl
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+    shutil.copystat(src, dst)
+
+
+def materialize(src: Path, dst: Path, mode="copy"):
+    """Create dst from src using mode; returns the mode that was actually used."""
+    if os.path.lexists(dst):
+        os.unlink(dst)
+    if mode == "hardlink":
+        try:
+            os.link(src, dst)
+            return mode
+        except OSError as exc:
+            _warn_fallback(mode, exc)
+    elif mode == "symlink":
+        try:
+            os.symlink(Path(src).resolve(), dst)
+            return mode
+        except OSError as exc:
+            _warn_fallback(mode, exc)
+    elif mode == "reflink":
+        try:
+            _reflink(src, dst)
+            return mode
+        except (OSError, ImportError) as exc:
+            if os.path.lexists(dst):
+                os.unlink(dst)
+            _warn_fallback(mode, exc)
+    shutil.copy2(src, dst)
+    return "copy"
+
+
+def reencode(src: Path, dst: Path, max_side, quality=90):
+    """Write src scaled so its longer side is max_side; returns False if it is already small enough."""
+    try:
+        from PIL import Image
+    except Exception as exc:
+        raise SystemExit("Pillow missing (needed for --max-side). Install with: pip install pillow") from exc
+
+    with Image.open(src) as img:
+        width, height = img.size
+        if max(width, height) <= max_side:
+            return False
+        scale = max_side / max(width, height)
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        # JPEG: let the decoder do most of the downscale via DCT scaling
+        img.draft(img.mode, size)
+        # Pixels stay as stored; the orientation tag is carried over so readers that
+        # apply EXIF (Ultralytics, cv2) see the same orientation as for the original
+        orientation = img.getexif().get(EXIF_ORIENTATION, 1)
+        out = img.resize(size, Image.LANCZOS)
+    fmt = {".jpg": "JPEG", ".jpeg": "JPEG", ".png": "PNG", ".webp": "WEBP"}.get(Path(dst).suffix.lower(), "JPEG")
+    if fmt == "JPEG" and out.mode not in ("RGB", "L"):
+        out = out.convert("RGB")
+    extra = {}
+    if orientation != 1:
+        exif = Image.Exif()
+        exif[EXIF_ORIENTATION] = orientation
+        extra["exif"] = exif.tobytes()
+    if os.path.lexists(dst):
+        os.unlink(dst)
+    if fmt == "PNG":
+        out.save(dst, fmt, optimize=True, **extra)
+    else:
+        out.save(dst, fmt, quality=quality, **extra)
+    return True
+
+
+def export_image(src: Path, dst: Path, mode="copy", max_side=0, quality=90):
+    """materialize(), or a downscaled re-encode when max_side is set and src is larger."""
+    if max_side and reencode(src, dst, max_side, quality):
+        return "resized"
+    return materialize(src, dst, mode)
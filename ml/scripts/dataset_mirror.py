@@ -0,0 +1,319 @@
+"""Content-addressed local mirror for downloaded dataset archives.
+
+Layout under the mirror root:
+  blobs/sha256/<hash>.zip                      archives, named by content
+  refs/<workspace>/<project>/<version>/<format>.json
+                                               key -> {sha256, size, source, fetched}
+  partial/<workspace>_<project>_<version>_<format>.part(.json)
+                                               interrupted transfer + its total size
+
+A key whose ref points at a blob with a matching SHA-256 is served from the
+mirror without touching the network. Interrupted transfers resume from the
+.part file (HTTP Range); if the server ignores the range or the archive size
+changed, the transfer restarts. Where archives come from is a FetchBackend:
+RoboflowBackend resolves the export link through the Roboflow REST API,
+HttpBackend and DirBackend serve <base>/<workspace>/<project>/<version>/<format>.zip
+from another mirror or a local directory (the offline stand-in for tests).
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+ROBOFLOW_API = "https://api.roboflow.com"
+CHUNK_BYTES = 1 << 20
+EXTRACT_MARKER = ".mirror.json"
+TIMEOUT = 60
+
+
+class DatasetKey:
+    def __init__(self, workspace, project, version, fmt):
+        self.workspace = workspace
+        self.project = project
+        self.version = int(version)
+        self.format = fmt
+
+    @property
+    def parts(self):
+        return [self.workspace, self.project, str(self.version), self.format]
+
+    def __str__(self):
+        return "/".join(self.parts)
+
+
+def sha256_file(path: Path, h=None):
+    h = h or hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_BYTES)
+            if not chunk:
+                return h
+            h.update(chunk)
+
+
+def _write_json(path: Path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: Path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class FetchBackend:
+    """Source of archives: locate(key) -> source, open(source, offset) -> (stream, start, total)."""
+
+    def locate(self, key: DatasetKey):
+        raise NotImplementedError
+
+    def open(self, source, offset):
+        raise NotImplementedError
+
+    def describe(self, source):
+        return str(source)
+
+
+class HttpBackend(FetchBackend):
+    """Archives at <base_url>/<workspace>/<project>/<version>/<format>.zip."""
+
+    def __init__(self, base_url=None):
+        self.base_url = (base_url or "").rstrip("/")
+
+    def locate(self, key):
+        return f"{self.base_url}/{'/'.join(urllib.parse.quote(p) for p in key.parts)}.zip"
+
+    def open(self, url, offset):
+        req = urllib.request.Request(url, headers={"Range": f"bytes={offset}-"} if offset else {})
+        try:
+            resp = urllib.request.urlopen(req, timeout=TIMEOUT)
+        except urllib.error.HTTPError as exc:
+            # 416: the partial file already holds everything the server has
+            if exc.code == 416 and offset:
+                return self.open(url, 0)
+            raise
+        if resp.status == 206:
+            # Content-Range: bytes START-END/TOTAL
+            span, _, total = resp.headers.get("Content-Range", "").rpartition("/")
+            start = int(span.split()[-1].split("-")[0])
+            return resp, start, int(total) if total.isdigit() else None
+        length = resp.headers.get("Content-Length")
+        return resp, 0, int(length) if length else None
+
+    def describe(self, url):
+        # Signed download links carry credentials in the query string
+        return urllib.parse.urlsplit(url)._replace(query="", fragment="").geturl()
+
+
+class RoboflowBackend(HttpBackend):
+    """Resolves the export link of a dataset version via the Roboflow REST API."""
+
+    def __init__(self, api_key, polls=30, poll_seconds=10):
+        super().__init__()
+        self.api_key = api_key
+        self.polls = polls
+        self.poll_seconds = poll_seconds
+
+    def locate(self, key):
+        url = f"{ROBOFLOW_API}/{'/'.join(key.parts)}?" + urllib.parse.urlencode({"api_key": self.api_key})
+        for attempt in range(self.polls):
+            try:
+                with urllib.request.urlopen(url, timeout=TIMEOUT) as resp:
+                    data = json.load(resp)
+            except urllib.error.HTTPError as exc:
+                raise SystemExit(f"Roboflow API error for {key}: HTTP {exc.code} {exc.read()[:200]!r}") from None
+            link = (data.get("export") or {}).get("link")
+            if link:
+                return link
+            # Roboflow builds the export on first request; it shows up once ready
+            print(f"Waiting for Roboflow to generate export {key} ({attempt + 1}/{self.polls})")
+            time.sleep(self.poll_seconds)
+        raise SystemExit(f"Roboflow export {key} not ready after {self.polls * self.poll_seconds}s; retry later")
+
+
+class DirBackend(FetchBackend):
+    """Archives at <root>/<workspace>/<project>/<version>/<format>.zip on the local disk."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def locate(self, key):
+        return self.root.joinpath(*key.parts[:-1], f"{key.format}.zip")
+
+    def open(self, path, offset):
+        f = open(path, "rb")
+        total = os.fstat(f.fileno()).st_size
+        start = min(offset, total)
+        f.seek(start)
+        return f, start, total
+
+
+def make_backend(source, api_key=None):
+    """'roboflow', an http(s) base URL or a local directory."""
+    if source == "roboflow":
+        if not api_key:
+            raise SystemExit("Missing API key. Set ROBOFLOW_API_KEY or pass --api-key")
+        return RoboflowBackend(api_key)
+    if source.startswith(("http://", "https://")):
+        return HttpBackend(source)
+    return DirBackend(source)
+
+
+class Mirror:
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def ref_path(self, key):
+        return self.root.joinpath("refs", *key.parts[:-1], f"{key.format}.json")
+
+    def blob_path(self, sha256):
+        return self.root / "blobs" / "sha256" / f"{sha256}.zip"
+
+    def part_path(self, key):
+        return self.root / "partial" / f"{'_'.join(key.parts)}.part"
+
+    def cached(self, key, expected_sha256=None):
+        """Blob path if the ref's archive is present and its checksum matches, else None."""
+        ref = _read_json(self.ref_path(key))
+        if not ref or (expected_sha256 and ref.get("sha256") != expected_sha256):
+            return None
+        blob = self.blob_path(ref["sha256"])
+        if not blob.exists() or blob.stat().st_size != ref.get("size"):
+            return None
+        if sha256_file(blob).hexdigest() != ref["sha256"]:
+            print(f"Cached archive {blob} is corrupt; fetching again", file=sys.stderr)
+            blob.unlink()
+            return None
+        return blob
+
+    def fetch(self, key, backend: FetchBackend, expected_sha256=None, force=False):
+        """Return (blob path, bytes transferred); 0 on a cache hit."""
+        if not force:
+            blob = self.cached(key, expected_sha256)
+            if blob is not None:
+                return blob, 0
+        source = backend.locate(key)
+        part = self.part_path(key)
+        sha256, size, downloaded = self._download(source, backend, part)
+        if expected_sha256 and sha256 != expected_sha256:
+            part.unlink()
+            raise SystemExit(f"Checksum mismatch for {key}: got {sha256}, expected {expected_sha256}")
+        blob = self.blob_path(sha256)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(part, blob)
+        Path(f"{part}.json").unlink(missing_ok=True)
+        _write_json(
+            self.ref_path(key),
+            {
+                "key": str(key),
+                "sha256": sha256,
+                "size": size,
+                "source": backend.describe(source),
+                "fetched": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+        )
+        return blob, downloaded
+
+    def _download(self, source, backend, part: Path):
+        part.parent.mkdir(parents=True, exist_ok=True)
+        part_meta = Path(f"{part}.json")
+        have = part.stat().st_size if part.exists() else 0
+        known_total = (_read_json(part_meta) or {}).get("total")
+        if have and have == known_total:
+            # Interrupted after the last byte, before the move into blobs/
+            return sha256_file(part).hexdigest(), have, 0
+        stream, start, total = backend.open(source, have)
+        if start != have or (known_total and total and known_total != total):
+            # Server ignored the range or the archive changed: start over
+            print(f"  restarting transfer (had {have / 1e6:.1f} MB)")
+            if start != 0:
+                stream.close()
+                stream, start, total = backend.open(source, 0)
+            have = 0
+        _write_json(part_meta, {"total": total})
+        h = sha256_file(part) if have else hashlib.sha256()
+        if have:
+            print(f"  resuming at {have / 1e6:.1f} MB of {total / 1e6 if total else float('nan'):.1f} MB")
+
+        begin = time.perf_counter()
+        last_report = begin
+        received = 0
+        with stream, open(part, "ab" if have else "wb") as f:
+            while True:
+                chunk = stream.read(CHUNK_BYTES)
+                if not chunk:
+                    break
+                f.write(chunk)
+                h.update(chunk)
+                received += len(chunk)
+                if time.perf_counter() - last_report > 1.0:
+                    last_report = time.perf_counter()
+                    rate = received / (last_report - begin) / 1e6
+                    print(f"  {(have + received) / 1e6:.1f} MB ({rate:.1f} MB/s)", end="\r", flush=True)
+        size = have + received
+        if total is not None and size != total:
+            raise SystemExit(f"Transfer ended at {size} of {total} bytes; run again to resume")
+        elapsed = max(time.perf_counter() - begin, 1e-9)
+        print(f"  {size / 1e6:.1f} MB, {received / 1e6:.1f} MB fetched ({received / elapsed / 1e6:.1f} MB/s)")
+        return h.hexdigest(), size, received
+
+
+def _member_path(out_dir: Path, name):
+    parts = Path(name).parts
+    if not parts or Path(name).is_absolute() or ".." in parts:
+        raise SystemExit(f"Refusing to extract unsafe archive path {name!r}")
+    return out_dir.joinpath(*parts)
+
+
+def _extract_members(blob, names, out_dir):
+    # One ZipFile per thread: a shared handle serializes every read
+    with zipfile.ZipFile(blob) as zf:
+        for name in names:
+            with zf.open(name) as src, open(_member_path(out_dir, name), "wb") as dst:
+                shutil.copyfileobj(src, dst, CHUNK_BYTES)
+    return len(names)
+
+
+def extract(blob: Path, out_dir: Path, sha256, threads=8, force=False):
+    """Unpack blob into out_dir unless it already holds this archive; returns files extracted."""
+    out_dir = Path(out_dir)
+    marker = out_dir / EXTRACT_MARKER
+    info = _read_json(marker)
+    if info and info.get("sha256") == sha256 and not force:
+        return 0
+    if out_dir.exists() and not info and any(out_dir.iterdir()):
+        raise SystemExit(f"{out_dir} exists and was not extracted from the mirror; remove it or pick another --out")
+
+    tmp_dir = out_dir.with_name(f"{out_dir.name}.partial")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    with zipfile.ZipFile(blob) as zf:
+        names = [i.filename for i in zf.infolist() if not i.is_dir()]
+    # Directories up front, so the threads never race on makedirs
+    for parent in {_member_path(tmp_dir, name).parent for name in names}:
+        parent.mkdir(parents=True, exist_ok=True)
+    step = max(1, -(-len(names) // (threads * 4)))
+    chunks = [names[i : i + step] for i in range(0, len(names), step)]
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        count = sum(pool.map(lambda chunk: _extract_members(blob, chunk, tmp_dir), chunks))
+    _write_json(tmp_dir / EXTRACT_MARKER, {"sha256": sha256, "files": count})
+
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    os.replace(tmp_dir, out_dir)
+    return count
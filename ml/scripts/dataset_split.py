@@ -0,0 +1,71 @@
+"""Deterministic per-sample split assignment shared by the exporters.
+
+In hash mode a sample's split depends only on its key (sample id or file
+stem) and the seed, so adding captures never moves existing samples.
+"""
+import hashlib
+import random
+
+
+SPLIT_MODES = ["random", "hash"]
+
+
+def _digest(key: str, seed: int):
+    return hashlib.sha1(f"{seed}:{key}".encode("utf-8")).digest()
+
+
+def hash_fraction(key: str, seed: int):
+    # Uniform value in [0, 1) derived from the first 8 digest bytes
+    return int.from_bytes(_digest(key, seed)[:8], "big") / float(1 << 64)
+
+
+def assign_split(key: str, train_ratio: float, seed: int, val_name="val"):
+    return "train" if hash_fraction(key, seed) < train_ratio else val_name
+
+
+def shard_name(key: str, shards: int, seed: int):
+    if shards <= 1:
+        return ""
+    # Use separate digest bytes so shards are independent of the split
+    idx = int.from_bytes(_digest(key, seed)[8:16], "big") % shards
+    return f"shard_{idx:03d}"
+
+
+def split_subdir(split: str, key: str, shards: int, seed: int):
+    shard = shard_name(key, shards, seed)
+    return f"{split}/{shard}" if shard else split
+
+
+def split_rows(rows, split_mode, train_ratio, seed, shards, counts):
+    """Route (file_name, key, label) rows to (file_name, subdir, label) export items.
+
+    Hash mode streams row by row. Random mode keeps the seeded shuffle + slice,
+    which needs every row in memory (only these small tuples, not the samples).
+    counts["train"] / counts["val"] are incremented as rows are routed.
+    """
+    if split_mode == "hash":
+        routed = ((row, assign_split(row[1], train_ratio, seed)) for row in rows)
+    else:
+        rows = list(rows)
+        random.seed(seed)
+        random.shuffle(rows)
+        split_idx = int(len(rows) * train_ratio)
+        routed = ((row, "train" if i < split_idx else "val") for i, row in enumerate(rows))
+    for (file_name, key, label), split in routed:
+        counts[split] = counts.get(split, 0) + 1
+        yield file_name, split_subdir(split, key, shards, seed), label
+
+
+def add_split_args(p):
+    p.add_argument(
+        "--split-mode",
+        choices=SPLIT_MODES,
+        default="random",
+        help="random: seeded shuffle + slice; hash: stable per-sample split from sample id/stem",
+    )
+    p.add_argument(
+        "--shards",
+        type=int,
+        default=0,
+        help="Spread each split over N stable shard subdirectories (0 = flat)",
+    )
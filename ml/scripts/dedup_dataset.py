@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""Find near-duplicate frames across app captures and YOLO (Roboflow) datasets.
+
+Every image gets a 64-bit DCT perceptual hash. Hashes are cached by file
+content hash, so re-runs only decode new or changed images. Near-duplicates
+(Hamming distance <= --max-distance) are found with a multi-index hash
+table: the hash is split into max_distance + 1 blocks, and by pigeonhole
+two hashes within the distance share at least one block exactly, so only
+bucket mates are compared. Each cluster keeps its first image (in source
+order) and lists the rest under "exclude" in the output JSON, which the
+exporters take via --exclude.
+"""
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+try:
+    import numpy as np
+    from PIL import Image
+except Exception as exc:
+    raise SystemExit("numpy/Pillow missing. Install with: pip install numpy pillow") from exc
+
+from dataset_index import iter_samples
+from dataset_pool import IMAGE_EXTS, add_worker_args, run_chunked
+from export_manifest import fingerprint
+
+
+CACHE_VERSION = 1
+DCT_SIZE = 32
+HASH_SIZE = 8
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Perceptual-hash dedup over app captures and YOLO datasets")
+    p.add_argument("--index", default=None, help="App index (index.json, .jsonl or shard dir)")
+    p.add_argument("--images-dir", default=None, help="Images for --index")
+    p.add_argument("--yolo", nargs="*", default=[], help="YOLO dataset roots (e.g. Roboflow downloads)")
+    p.add_argument("--out", required=True, help="Output JSON (clusters + exclude list)")
+    p.add_argument("--max-distance", type=int, default=4, help="Max Hamming distance of 64-bit hashes")
+    p.add_argument("--cache", default=None, help="Hash cache (default: phash_cache.json next to --out)")
+    p.add_argument(
+        "--samples-per-sec",
+        type=float,
+        default=None,
+        help="Training throughput (samples_per_sec from train_board_kp.py) for the time estimate",
+    )
+    add_worker_args(p)
+    args = p.parse_args(argv)
+    if not args.index and not args.yolo:
+        p.error("pass --index and/or --yolo")
+    if args.index and not args.images_dir:
+        p.error("--index needs --images-dir")
+    return args
+
+
+def dct_matrix(n):
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    m = np.sqrt(2.0 / n) * np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+    m[0] /= np.sqrt(2.0)
+    return m
+
+
+_DCT = dct_matrix(DCT_SIZE)
+
+
+def phash(path):
+    """64-bit DCT hash: low-frequency 8x8 block thresholded at its median (DC excluded)."""
+    with Image.open(path) as img:
+        gray = img.convert("L").resize((DCT_SIZE, DCT_SIZE), Image.LANCZOS)
+    a = np.asarray(gray, dtype=np.float64)
+    low = (_DCT @ a @ _DCT.T)[:HASH_SIZE, :HASH_SIZE].ravel()
+    bits = low > np.median(low[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def fingerprint_task(task):
+    path, previous = task
+    try:
+        return fingerprint(Path(path), previous)
+    except FileNotFoundError:
+        return None
+
+
+def phash_task(path):
+    try:
+        return phash(path)
+    except OSError:
+        return None
+
+
+def collect_images(args):
+    """Return [(source, absolute path)] in source order (app captures first)."""
+    found = {}
+    if args.index:
+        images_dir = Path(args.images_dir)
+        for sample in iter_samples(args.index):
+            if sample.get("fileName"):
+                found.setdefault(os.path.abspath(images_dir / sample["fileName"]), "app")
+    for root in args.yolo:
+        for p in sorted(p for p in Path(root).rglob("*") if p.suffix.lower() in IMAGE_EXTS):
+            found.setdefault(os.path.abspath(p), root)
+    return [(source, path) for path, source in found.items()]
+
+
+def load_cache(path: Path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}, {}
+    if data.get("version") != CACHE_VERSION:
+        return {}, {}
+    return data.get("files") or {}, data.get("hashes") or {}
+
+
+def save_cache(path: Path, files, hashes):
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": CACHE_VERSION, "files": files, "hashes": hashes}, f)
+    os.replace(tmp_path, path)
+
+
+def popcount64(values):
+    return np.unpackbits(values.astype(">u8").view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+def cluster_hashes(hashes, max_distance):
+    """Union near-duplicate hashes; returns root[i], the lowest index in i's cluster."""
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    n = len(hashes)
+    parent = list(range(n))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    blocks = max_distance + 1
+    bounds = np.linspace(0, 64, blocks + 1).astype(int)
+    comparisons = 0
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        if hi == lo:
+            continue
+        mask = np.uint64((1 << (hi - lo)) - 1)
+        keys = (hashes >> np.uint64(lo)) & mask
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        ends = np.r_[starts[1:], n]
+        for s, e in zip(starts, ends):
+            if e - s < 2:
+                continue
+            members = np.sort(order[s:e])
+            for j in range(len(members) - 1):
+                rest = members[j + 1 :]
+                dist = popcount64(hashes[members[j]] ^ hashes[rest])
+                comparisons += len(rest)
+                for k in rest[dist <= max_distance]:
+                    ra, rb = find(int(members[j])), find(int(k))
+                    if ra != rb:
+                        parent[max(ra, rb)] = min(ra, rb)
+    return [find(i) for i in range(n)], comparisons
+
+
+def format_bytes(n):
+    for unit in ["B", "KB", "MB", "GB"]:
+        if n < 1024 or unit == "GB":
+            return f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    out_path = Path(args.out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    cache_path = Path(args.cache) if args.cache else out_path.with_name("phash_cache.json")
+    files_cache, hash_cache = load_cache(cache_path)
+
+    images = collect_images(args)
+    start = time.perf_counter()
+    tasks = [(path, files_cache.get(path)) for _, path in images]
+    fps = list(run_chunked(fingerprint_task, tasks, args.workers, args.chunk_size, desc="fingerprint"))
+
+    entries = []
+    for (source, path), fp in zip(images, fps):
+        if fp is None:
+            continue
+        files_cache[path] = fp
+        entries.append((source, path, fp))
+    missing = len(images) - len(entries)
+
+    # Decode only one image per unseen content hash
+    todo = {}
+    for _, path, fp in entries:
+        if fp["content"] not in hash_cache:
+            todo.setdefault(fp["content"], path)
+    computed = list(run_chunked(phash_task, list(todo.values()), args.workers, args.chunk_size, desc="phash"))
+    for content, value in zip(todo, computed):
+        if value is not None:
+            hash_cache[content] = f"{value:016x}"
+    save_cache(cache_path, files_cache, hash_cache)
+    hashed_in = time.perf_counter() - start
+
+    entries = [e for e in entries if e[2]["content"] in hash_cache]
+    hashes = [int(hash_cache[fp["content"]], 16) for _, _, fp in entries]
+    start = time.perf_counter()
+    roots, comparisons = cluster_hashes(hashes, args.max_distance)
+    clustered_in = time.perf_counter() - start
+
+    clusters = {}
+    for i, root in enumerate(roots):
+        if i != root:
+            clusters.setdefault(root, []).append(i)
+    exclude = [entries[i][1] for members in clusters.values() for i in members]
+    saved_bytes = sum(entries[i][2]["size"] for members in clusters.values() for i in members)
+    by_source = {}
+    for members in clusters.values():
+        for i in members:
+            by_source[entries[i][0]] = by_source.get(entries[i][0], 0) + 1
+
+    report = {
+        "version": 1,
+        "max_distance": args.max_distance,
+        "total": len(entries),
+        "kept": len(entries) - len(exclude),
+        "saved_bytes": saved_bytes,
+        "dropped_by_source": by_source,
+        "clusters": [
+            {"keep": entries[root][1], "drop": [entries[i][1] for i in members]}
+            for root, members in sorted(clusters.items())
+        ],
+        "exclude": exclude,
+    }
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+
+    total = max(len(entries), 1)
+    print(
+        f"Hashed {len(entries)} images ({len(todo)} decoded, {len(entries) - len(todo)} cached) "
+        f"in {hashed_in:.1f}s; clustered in {clustered_in:.2f}s ({comparisons} comparisons)"
+    )
+    if missing:
+        print(f"Missing images: {missing}")
+    print(f"Near-duplicate clusters: {len(clusters)}, dropped {len(exclude)} / {len(entries)} ({len(exclude) / total:.1%})")
+    for source, count in by_source.items():
+        print(f"  {source}: {count}")
+    print(f"Disk saved per copied export: {format_bytes(saved_bytes)}")
+    line = f"Train time saved: {len(exclude) / total:.1%} of every epoch"
+    if args.samples_per_sec:
+        line += f" (~{len(exclude) / args.samples_per_sec:.1f}s/epoch at {args.samples_per_sec:.0f} samples/s)"
+    print(line)
+    print(f"Exclude list: {out_path} (pass to the exporters with --exclude)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""NumPy port of detectDartFromDiff (src/ui/utils/dartDetection.ts).
+
+Same arithmetic as the app: homography from the four calibration points to
+the unit circle (computeHomographyForSettings), sampled grid with
+step = floor(min(w, h) / sampleSize), in-board test r <= 1.05, grey-level
+diff threshold and centroid of the changed pixels. The per-pixel
+isWithinBoard/applyHomography calls become one array operation.
+"""
+import math
+
+import numpy as np
+
+
+BOARD_RADIUS_LIMIT = 1.05
+# Where the calibration points land on the unit circle (20 top, 6 right, 3 bottom, 11 left)
+UNIT_TARGETS = [(0.0, 1.0), (1.0, 0.0), (0.0, -1.0), (-1.0, 0.0)]
+
+
+def solve_linear_system(matrix, vector):
+    """Gauss-Jordan with partial pivoting, step for step like homography.ts."""
+    n = len(vector)
+    aug = [list(row) + [vector[i]] for i, row in enumerate(matrix)]
+    for col in range(n):
+        pivot = col
+        for row in range(col + 1, n):
+            if abs(aug[row][col]) > abs(aug[pivot][col]):
+                pivot = row
+        if abs(aug[pivot][col]) < 1e-12:
+            return None
+        if pivot != col:
+            aug[col], aug[pivot] = aug[pivot], aug[col]
+        divisor = aug[col][col]
+        for k in range(col, n + 1):
+            aug[col][k] /= divisor
+        for row in range(n):
+            if row == col:
+                continue
+            factor = aug[row][col]
+            for k in range(col, n + 1):
+                aug[row][k] -= factor * aug[col][k]
+    return [row[n] for row in aug]
+
+
+def compute_homography(src, dst):
+    if len(src) != 4 or len(dst) != 4:
+        return None
+    matrix = []
+    vector = []
+    for (x, y), (u, v) in zip(src, dst):
+        matrix.append([x, y, 1, 0, 0, 0, -u * x, -u * y])
+        vector.append(u)
+        matrix.append([0, 0, 0, x, y, 1, -v * x, -v * y])
+        vector.append(v)
+    solution = solve_linear_system(matrix, vector)
+    if solution is None:
+        return None
+    h11, h12, h13, h21, h22, h23, h31, h32 = solution
+    return [[h11, h12, h13], [h21, h22, h23], [h31, h32, 1.0]]
+
+
+def homography_for_settings(settings, width, height):
+    points = settings.get("calibrationPoints")
+    if not points or len(points) != 4:
+        return None
+    src = [(pt["x"] * width, pt["y"] * height) for pt in points]
+    return compute_homography(src, UNIT_TARGETS)
+
+
+def sample_step(width, height, sample_size):
+    return max(1, math.floor(min(width, height) / sample_size))
+
+
+def project_grid(homography, xs, ys):
+    """applyHomography over the xs x ys grid; returns (u, v, valid)."""
+    x = xs[None, :].astype(np.float64)
+    y = ys[:, None].astype(np.float64)
+    h = homography
+    denom = h[2][0] * x + h[2][1] * y + h[2][2]
+    valid = np.abs(denom) >= 1e-12
+    safe = np.where(valid, denom, 1.0)
+    u = (h[0][0] * x + h[0][1] * y + h[0][2]) / safe
+    v = (h[1][0] * x + h[1][1] * y + h[1][2]) / safe
+    return u, v, valid
+
+
+def board_mask(settings, width, height, step):
+    """isWithinBoard for every sampled grid point, as a (len(ys), len(xs)) bool array."""
+    xs = np.arange(0, width, step)
+    ys = np.arange(0, height, step)
+    homography = homography_for_settings(settings, width, height)
+    if homography is not None:
+        u, v, valid = project_grid(homography, xs, ys)
+        r = np.sqrt(u * u + v * v)
+        return valid & (r <= BOARD_RADIUS_LIMIT)
+
+    center_x = settings["centerX"] * width
+    center_y = settings["centerY"] * height
+    dx = xs[None, :] - center_x
+    dy = center_y - ys[:, None]
+    effective_radius = (min(width, height) / 2) * settings["scale"]
+    r = np.sqrt(dx * dx + dy * dy) / effective_radius
+    return r <= BOARD_RADIUS_LIMIT
+
+
+def detect_dart_from_diff(
+    baseline,
+    current,
+    settings,
+    threshold=28,
+    min_count=25,
+    max_count=1800,
+    sample_size=200,
+    mask=None,
+):
+    """baseline/current: uint8 (H, W, 3+) frames. Returns {x, y, count} normalized, or None."""
+    if baseline is None or current is None:
+        return None
+    if baseline.shape[:2] != current.shape[:2]:
+        return None
+
+    height, width = baseline.shape[:2]
+    step = sample_step(width, height, sample_size)
+    if mask is None:
+        mask = board_mask(settings, width, height, step)
+
+    base = baseline[::step, ::step, :3].astype(np.int32)
+    curr = current[::step, ::step, :3].astype(np.int32)
+    base_value = (base[..., 0] + base[..., 1] + base[..., 2]) / 3
+    curr_value = (curr[..., 0] + curr[..., 1] + curr[..., 2]) / 3
+    hit = mask & (np.abs(curr_value - base_value) >= threshold)
+
+    count = int(hit.sum())
+    if count < min_count:
+        return None
+    if count > max_count:
+        return None
+
+    ys, xs = np.nonzero(hit)
+    sum_x = float((xs * step).sum())
+    sum_y = float((ys * step).sum())
+    return {
+        "x": sum_x / count / width,
+        "y": sum_y / count / height,
+        "count": count,
+    }
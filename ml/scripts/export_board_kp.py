@@ -1,22 +1,34 @@
 #!/usr/bin/env python3
 import argparse
+import itertools
 import json
-import random
-import shutil
 from pathlib import Path
 
+from dataset_exclude import add_exclude_args, is_excluded, load_excluded
+from dataset_index import iter_samples
+from dataset_link import add_link_args, add_resize_args
+from dataset_pool import add_worker_args
+from dataset_split import add_split_args, split_rows
+from export_manifest import format_stats, sync_export
+
 
 ORDER = ["20_top", "6_right", "3_bottom", "11_left"]
 
 
-def parse_args():
+def parse_args(argv=None):
     p = argparse.ArgumentParser(description="Export board keypoints dataset from app index.json")
-    p.add_argument("--index", required=True, help="Path to index.json")
+    p.add_argument("--index", required=True, help="index.json, a .jsonl file or a sharded index directory")
     p.add_argument("--images-dir", required=True, help="Directory with sample images")
     p.add_argument("--out", required=True, help="Output directory")
     p.add_argument("--train", type=float, default=0.85, help="Train split ratio")
     p.add_argument("--seed", type=int, default=42, help="Random seed")
-    return p.parse_args()
+    add_split_args(p)
+    add_link_args(p)
+    add_resize_args(p)
+    add_worker_args(p)
+    add_exclude_args(p)
+    p.add_argument("--full", action="store_true", help="Rewrite every sample, ignoring the export manifest")
+    return p.parse_args(argv)
 
 
 def extract_points(sample):
@@ -38,69 +50,69 @@ def extract_points(sample):
     return out
 
 
-def main():
-    args = parse_args()
-    with open(args.index, "r", encoding="utf-8") as f:
-        samples = json.load(f)
+def make_label(points):
+    flat = []
+    for x, y in points:
+        flat.extend([x, y])
+    return " ".join([f"{v:.6f}" for v in flat]) + "\n"
+
 
-    pairs = []
+def iter_rows(samples, images_dir: Path, excluded=frozenset()):
     for sample in samples:
         file_name = sample.get("fileName")
-        if not file_name:
+        if not file_name or is_excluded(images_dir / file_name, excluded):
             continue
         points = extract_points(sample)
         if not points:
             continue
-        pairs.append((file_name, points))
+        key = sample.get("id") or Path(file_name).stem
+        yield file_name, key, make_label(points)
+
+
+def main(argv=None):
+    args = parse_args(argv)
 
-    if not pairs:
+    images_dir = Path(args.images_dir)
+    rows = iter_rows(iter_samples(args.index), images_dir, load_excluded(args.exclude))
+    first = next(rows, None)
+    if first is None:
         print("No samples with calibrationPoints found in index.json")
         return
 
-    random.seed(args.seed)
-    random.shuffle(pairs)
-    split_idx = int(len(pairs) * args.train)
-    train_pairs = pairs[:split_idx]
-    val_pairs = pairs[split_idx:]
+    counts = {"train": 0, "val": 0}
+    items = split_rows(itertools.chain([first], rows), args.split_mode, args.train, args.seed, args.shards, counts)
 
     out_dir = Path(args.out)
-    train_img = out_dir / "images" / "train"
-    val_img = out_dir / "images" / "val"
-    train_lbl = out_dir / "labels" / "train"
-    val_lbl = out_dir / "labels" / "val"
-
-    for d in [train_img, val_img, train_lbl, val_lbl]:
-        d.mkdir(parents=True, exist_ok=True)
-
-    def write_sample(file_name, points, img_dir, lbl_dir):
-        src_path = Path(args.images_dir) / file_name
-        dst_path = img_dir / file_name
-        if not dst_path.exists():
-            shutil.copy2(src_path, dst_path)
-
-        flat = []
-        for x, y in points:
-            flat.extend([x, y])
-        label = " ".join([f"{v:.6f}" for v in flat]) + "\n"
-        label_path = lbl_dir / f"{Path(file_name).stem}.txt"
-        with open(label_path, "w", encoding="utf-8") as out:
-            out.write(label)
-
-    for file_name, points in train_pairs:
-        write_sample(file_name, points, train_img, train_lbl)
-    for file_name, points in val_pairs:
-        write_sample(file_name, points, val_img, val_lbl)
+    for split in ["train", "val"]:
+        (out_dir / "images" / split).mkdir(parents=True, exist_ok=True)
+        (out_dir / "labels" / split).mkdir(parents=True, exist_ok=True)
+
+    stats = sync_export(
+        out_dir,
+        "board_kp",
+        images_dir,
+        items,
+        force=args.full,
+        link_mode=args.link_mode,
+        max_side=args.max_side,
+        quality=args.quality,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+    )
 
     meta = {
         "order": ORDER,
         "format": "x20 y20 x6 y6 x3 y3 x11 y11",
-        "train": len(train_pairs),
-        "val": len(val_pairs),
+        "split_mode": args.split_mode,
+        "shards": args.shards,
+        "train": counts["train"],
+        "val": counts["val"],
     }
     with open(out_dir / "meta.json", "w", encoding="utf-8") as f:
         json.dump(meta, f, indent=2)
 
-    print(f"Exported {len(train_pairs)} train / {len(val_pairs)} val samples")
+    print(f"Exported {counts['train']} train / {counts['val']} val samples")
+    print(f"Changes: {format_stats(stats)}")
     print(f"Dataset root: {out_dir}")
 
 
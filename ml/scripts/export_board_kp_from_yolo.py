@@ -1,20 +1,15 @@
 #!/usr/bin/env python3
 import argparse
-import itertools
-import math
-import shutil
+from functools import partial
 from pathlib import Path
 
+from dataset_exclude import add_exclude_args, is_excluded, load_excluded
+from dataset_link import add_link_args, add_resize_args, export_image
+from dataset_pool import add_worker_args, index_images, run_chunked
+from dataset_split import add_split_args, assign_split, shard_name
 
-TARGET_ANGLES = [
-    -math.pi / 2,  # top (20)
-    0.0,           # right (6)
-    math.pi / 2,   # bottom (3)
-    math.pi,       # left (11)
-]
 
-
-def parse_args():
+def parse_args(argv=None):
     p = argparse.ArgumentParser(description="Convert YOLO object dataset to board keypoint regression dataset")
     p.add_argument("--data", required=True, help="YOLO dataset root (train/valid/test) with labels")
     p.add_argument("--out", required=True, help="Output dataset root")
@@ -23,106 +18,138 @@ def parse_args():
         default="1,2,3,4",
         help="Comma-separated class indices for calibration points (default: 1,2,3,4)",
     )
-    return p.parse_args()
-
-
-def ang_diff(a, b):
-    diff = (a - b + math.pi) % (2 * math.pi) - math.pi
-    return abs(diff)
-
-
-def order_points(points):
-    # points: list of (x,y)
-    cx = sum(p[0] for p in points) / 4
-    cy = sum(p[1] for p in points) / 4
-    angles = [math.atan2(p[1] - cy, p[0] - cx) for p in points]
-    best = None
-    best_cost = 1e9
-    for perm in itertools.permutations(range(4)):
-        cost = 0.0
-        for i, idx in enumerate(perm):
-            cost += ang_diff(angles[idx], TARGET_ANGLES[i])
-        if cost < best_cost:
-            best_cost = cost
-            best = perm
-    return [points[i] for i in best]
-
-
-def parse_label_file(path, cal_classes):
-    points = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            parts = line.strip().split()
-            if len(parts) < 5:
-                continue
-            try:
-                cls = int(float(parts[0]))
-                x = float(parts[1])
-                y = float(parts[2])
-            except Exception:
-                continue
-            if cls in cal_classes:
-                points.append((x, y))
-    return points
-
-
-def process_split(split_dir: Path, out_dir: Path, cal_classes):
+    p.add_argument(
+        "--train",
+        type=float,
+        default=0.85,
+        help="Train split ratio (only with --split-mode hash)",
+    )
+    p.add_argument("--seed", type=int, default=42, help="Hash salt (only with --split-mode hash)")
+    p.add_argument(
+        "--max-candidates",
+        type=int,
+        default=8,
+        help="Calibration detections considered per image when more than 4 are present",
+    )
+    add_split_args(p)
+    add_link_args(p)
+    add_resize_args(p)
+    add_exclude_args(p)
+    add_worker_args(p)
+    return p.parse_args(argv)
+
+
+HASH_SPLITS = {"train", "valid", "val"}
+
+
+def route_sample(stem, split, split_mode="random", train=0.85, seed=42, shards=0):
+    """Return the output (split, shard) for a sample stem."""
+    if split_mode == "hash" and split in HASH_SPLITS:
+        # Pool train/val and re-split by stem so samples never move; test stays held out
+        split = assign_split(stem, train, seed)
+    return split, shard_name(stem, shards, seed)
+
+
+def write_sample(job, dst: Path, route, link_mode="copy", max_side=0, quality=90):
+    (stem, img_file), ordered = job
+    out_split, shard = route(stem)
+    out_images = dst / out_split / "images" / shard
+    out_labels = dst / out_split / "labels" / shard
+    out_images.mkdir(parents=True, exist_ok=True)
+    out_labels.mkdir(parents=True, exist_ok=True)
+
+    # write label
+    flat = []
+    for x, y in ordered:
+        flat.extend([x, y])
+    label_out = out_labels / f"{stem}.txt"
+    with open(label_out, "w", encoding="utf-8") as f:
+        f.write(" ".join([f"{v:.6f}" for v in flat]) + "\n")
+
+    export_image(img_file, out_images / img_file.name, link_mode, max_side, quality)
+    return out_split
+
+
+def process_split(
+    split_dir: Path,
+    dst: Path,
+    cal_classes,
+    route,
+    link_mode="copy",
+    workers=1,
+    chunk_size=256,
+    max_candidates=8,
+    excluded=frozenset(),
+    max_side=0,
+    quality=90,
+):
+    """Convert one source split; route(stem) returns the output (split, shard)."""
     images_dir = split_dir / "images"
     labels_dir = split_dir / "labels"
+    kept = {}
     if not images_dir.exists() or not labels_dir.exists():
-        return 0
-
-    (out_dir / "images").mkdir(parents=True, exist_ok=True)
-    (out_dir / "labels").mkdir(parents=True, exist_ok=True)
-
-    kept = 0
-    for label_file in labels_dir.glob("*.txt"):
-        stem = label_file.stem
-        img_file = None
-        for ext in [".jpg", ".jpeg", ".png", ".webp"]:
-            cand = images_dir / f"{stem}{ext}"
-            if cand.exists():
-                img_file = cand
-                break
-        if img_file is None:
-            continue
-
-        points = parse_label_file(label_file, cal_classes)
-        if len(points) < 4:
-            continue
-
-        # keep first 4 points if more present
-        points = points[:4]
-        ordered = order_points(points)
-
-        # write label
-        flat = []
-        for x, y in ordered:
-            flat.extend([x, y])
-        label_out = out_dir / "labels" / f"{stem}.txt"
-        with open(label_out, "w", encoding="utf-8") as f:
-            f.write(" ".join([f"{v:.6f}" for v in flat]) + "\n")
-
-        shutil.copy2(img_file, out_dir / "images" / img_file.name)
-        kept += 1
-
+        return kept
+
+    # Imported here so label-only `--help` stays free of NumPy (see ml.py)
+    from board_kp_order import order_parsed
+    from label_cache import yolo_labels
+
+    images = index_images(images_dir)
+    table = yolo_labels(labels_dir)
+    tasks, parsed = [], []
+    for stem, points in zip(table.stems.tolist(), table.points_by_stem(cal_classes)):
+        if stem in images and not is_excluded(images[stem], excluded):
+            tasks.append((stem, images[stem]))
+            parsed.append(points)
+
+    ordered = order_parsed(parsed, max_candidates)
+    jobs = [(tasks[i], ordered[i]) for i in sorted(ordered)]
+
+    write = partial(write_sample, dst=dst, route=route, link_mode=link_mode, max_side=max_side, quality=quality)
+    for out_split in run_chunked(write, jobs, workers=workers, chunk_size=chunk_size, desc=f"{split_dir.name} write"):
+        kept[out_split] = kept.get(out_split, 0) + 1
     return kept
 
 
-def main():
-    args = parse_args()
+def main(argv=None):
+    args = parse_args(argv)
     cal_classes = {int(x.strip()) for x in args.cal_classes.split(",") if x.strip()}
 
     src = Path(args.data)
     dst = Path(args.out)
     dst.mkdir(parents=True, exist_ok=True)
+    excluded = load_excluded(args.exclude)
 
     totals = {}
     for split in ["train", "valid", "val", "test"]:
         split_dir = src / split
-        if split_dir.exists():
-            out_split = dst / split
-            totals[split] = process_split(split_dir, out_split, cal_classes)
+        if not split_dir.exists():
+            continue
+        if args.split_mode != "hash" or split not in HASH_SPLITS:
+            totals.setdefault(split, 0)
+        route = partial(
+            route_sample,
+            split=split,
+            split_mode=args.split_mode,
+            train=args.train,
+            seed=args.seed,
+            shards=args.shards,
+        )
+        kept = process_split(
+            split_dir,
+            dst,
+            cal_classes,
+            route,
+            link_mode=args.link_mode,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            max_candidates=args.max_candidates,
+            excluded=excluded,
+            max_side=args.max_side,
+            quality=args.quality,
+        )
+        for k, v in kept.items():
+            totals[k] = totals.get(k, 0) + v
 
     print("Converted splits:")
     for k, v in totals.items():
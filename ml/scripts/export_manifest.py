@@ -0,0 +1,174 @@
+"""Export manifest shared by export_yolo.py and export_board_kp.py.
+
+The manifest lives in the output directory and records, per sample, the
+source image fingerprint, the split it was written to and a hash of the
+label text. A re-run only touches samples whose entry changed.
+"""
+import hashlib
+import json
+import os
+from functools import partial
+from pathlib import Path
+
+from dataset_link import export_image
+from dataset_pool import run_chunked
+
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def sha1_bytes(data: bytes):
+    return hashlib.sha1(data).hexdigest()
+
+
+def hash_file(path: Path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def fingerprint(path: Path, previous=None):
+    # Only re-hash the image when size or mtime changed since the last export
+    st = path.stat()
+    if previous and previous.get("size") == st.st_size and previous.get("mtime_ns") == st.st_mtime_ns:
+        content = previous.get("content")
+    else:
+        content = hash_file(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "content": content}
+
+
+def load_manifest(out_dir: Path, exporter: str):
+    path = out_dir / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != MANIFEST_VERSION or data.get("exporter") != exporter:
+        return {}
+    return data.get("samples") or {}
+
+
+def save_manifest(out_dir: Path, exporter: str, samples):
+    path = out_dir / MANIFEST_NAME
+    tmp_path = path.with_suffix(".json.tmp")
+    data = {"version": MANIFEST_VERSION, "exporter": exporter, "samples": samples}
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def sample_paths(out_dir: Path, split: str, file_name: str):
+    img_path = out_dir / "images" / split / file_name
+    label_path = out_dir / "labels" / split / f"{Path(file_name).stem}.txt"
+    return img_path, label_path
+
+
+def remove_sample(out_dir: Path, split: str, file_name: str):
+    for path in sample_paths(out_dir, split, file_name):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _export_job(job, max_side, quality):
+    src_path, img_path, link_mode = job
+    return export_image(src_path, img_path, link_mode, max_side, quality)
+
+
+def sync_export(
+    out_dir: Path,
+    exporter: str,
+    images_dir: Path,
+    items,
+    force=False,
+    link_mode="copy",
+    max_side=0,
+    quality=90,
+    workers=1,
+    chunk_size=256,
+):
+    """Write (file_name, split, label_text) items into out_dir incrementally.
+
+    Images are materialized (or re-encoded with max_side) on `workers` processes.
+    Returns a dict with counts for added/updated/moved/removed/unchanged/missing.
+    """
+    previous = load_manifest(out_dir, exporter)
+    current = {}
+    stats = {"added": 0, "updated": 0, "moved": 0, "removed": 0, "unchanged": 0, "missing": 0}
+    jobs = []
+
+    for file_name, split, label in items:
+        src_path = images_dir / file_name
+        if not src_path.exists():
+            stats["missing"] += 1
+            continue
+
+        prev = previous.get(file_name)
+        entry = fingerprint(src_path, prev)
+        entry["split"] = split
+        entry["label"] = sha1_bytes(label.encode("utf-8"))
+        entry["link"] = link_mode
+        if max_side:
+            entry["resize"] = [max_side, quality]
+        img_path, label_path = sample_paths(out_dir, split, file_name)
+        current[file_name] = entry
+
+        if not force and prev == entry and img_path.exists() and label_path.exists():
+            stats["unchanged"] += 1
+            continue
+
+        moved = prev is not None and prev.get("split") != split
+        if moved:
+            remove_sample(out_dir, prev["split"], file_name)
+
+        img_path.parent.mkdir(parents=True, exist_ok=True)
+        label_path.parent.mkdir(parents=True, exist_ok=True)
+        if (
+            force
+            or moved
+            or prev is None
+            or prev.get("content") != entry["content"]
+            or prev.get("link") != link_mode
+            or prev.get("resize") != entry.get("resize")
+            or not img_path.exists()
+        ):
+            jobs.append((src_path, img_path, link_mode))
+        if force or moved or prev is None or prev.get("label") != entry["label"] or not label_path.exists():
+            with open(label_path, "w", encoding="utf-8") as out:
+                out.write(label)
+
+        if prev is None:
+            stats["added"] += 1
+        elif moved:
+            stats["moved"] += 1
+        else:
+            stats["updated"] += 1
+
+    export = partial(_export_job, max_side=max_side, quality=quality)
+    for _ in run_chunked(export, jobs, workers=workers, chunk_size=chunk_size, desc="images"):
+        pass
+
+    for file_name, prev in previous.items():
+        if file_name in current:
+            continue
+        if prev.get("split"):
+            remove_sample(out_dir, prev["split"], file_name)
+        stats["removed"] += 1
+
+    save_manifest(out_dir, exporter, current)
+    return stats
+
+
+def format_stats(stats):
+    keys = ["added", "updated", "moved", "removed", "unchanged", "missing"]
+    return ", ".join(f"{k} {stats[k]}" for k in keys)
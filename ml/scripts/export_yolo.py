@@ -1,70 +1,83 @@
 #!/usr/bin/env python3
 import argparse
-import json
-import os
-import random
-import shutil
+import itertools
 from pathlib import Path
 
+from dataset_exclude import add_exclude_args, is_excluded, load_excluded
+from dataset_index import iter_samples
+from dataset_link import add_link_args, add_resize_args
+from dataset_pool import add_worker_args
+from dataset_split import add_split_args, split_rows
+from export_manifest import format_stats, sync_export
 
-def parse_args():
+
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description="Export dataset index.json to YOLO format")
-    parser.add_argument("--index", required=True, help="Path to index.json")
+    parser.add_argument("--index", required=True, help="index.json, a .jsonl file or a sharded index directory")
     parser.add_argument("--images-dir", required=True, help="Directory with sample images")
     parser.add_argument("--out", required=True, help="Output directory")
     parser.add_argument("--train", type=float, default=0.8, help="Train split ratio")
     parser.add_argument("--seed", type=int, default=42, help="Random seed")
-    return parser.parse_args()
+    add_split_args(parser)
+    add_link_args(parser)
+    add_resize_args(parser)
+    add_worker_args(parser)
+    add_exclude_args(parser)
+    parser.add_argument("--full", action="store_true", help="Rewrite every sample, ignoring the export manifest")
+    return parser.parse_args(argv)
+
+
+def sample_key(sample):
+    return sample.get("id") or Path(sample["fileName"]).stem
 
 
-def main():
-    args = parse_args()
-    with open(args.index, "r", encoding="utf-8") as f:
-        samples = json.load(f)
+def make_label(sample):
+    ann = sample["annotation"]
+    # YOLO format: class x y w h (normalized)
+    # We store a tiny box around the dart tip
+    x = ann["x"]
+    y = ann["y"]
+    w = 0.02
+    h = 0.02
+    return f"0 {x:.6f} {y:.6f} {w:.6f} {h:.6f}\n"
 
-    samples = [s for s in samples if "annotation" in s and s.get("annotation")]
-    if not samples:
+
+def main(argv=None):
+    args = parse_args(argv)
+    images_dir = Path(args.images_dir)
+    excluded = load_excluded(args.exclude)
+
+    # Stream the index; only (fileName, key, label) rows are kept per sample
+    rows = (
+        (s["fileName"], sample_key(s), make_label(s))
+        for s in iter_samples(args.index)
+        if "annotation" in s and s.get("annotation") and not is_excluded(images_dir / s["fileName"], excluded)
+    )
+    first = next(rows, None)
+    if first is None:
         print("No annotated samples found.")
         return
 
-    random.seed(args.seed)
-    random.shuffle(samples)
-    split_idx = int(len(samples) * args.train)
-    train_samples = samples[:split_idx]
-    val_samples = samples[split_idx:]
+    counts = {"train": 0, "val": 0}
+    items = split_rows(itertools.chain([first], rows), args.split_mode, args.train, args.seed, args.shards, counts)
 
     out_dir = Path(args.out)
-    train_img = out_dir / "images" / "train"
-    val_img = out_dir / "images" / "val"
-    train_lbl = out_dir / "labels" / "train"
-    val_lbl = out_dir / "labels" / "val"
-
-    for d in [train_img, val_img, train_lbl, val_lbl]:
-        d.mkdir(parents=True, exist_ok=True)
-
-    def write_sample(sample, img_dir, lbl_dir):
-        file_name = sample["fileName"]
-        src_path = Path(args.images_dir) / file_name
-        dst_path = img_dir / file_name
-        if not dst_path.exists():
-            shutil.copy2(src_path, dst_path)
-
-        ann = sample["annotation"]
-        # YOLO format: class x y w h (normalized)
-        # We store a tiny box around the dart tip
-        x = ann["x"]
-        y = ann["y"]
-        w = 0.02
-        h = 0.02
-        label = f"0 {x:.6f} {y:.6f} {w:.6f} {h:.6f}\n"
-        label_path = lbl_dir / f"{Path(file_name).stem}.txt"
-        with open(label_path, "w", encoding="utf-8") as out:
-            out.write(label)
-
-    for sample in train_samples:
-        write_sample(sample, train_img, train_lbl)
-    for sample in val_samples:
-        write_sample(sample, val_img, val_lbl)
+    for split in ["train", "val"]:
+        (out_dir / "images" / split).mkdir(parents=True, exist_ok=True)
+        (out_dir / "labels" / split).mkdir(parents=True, exist_ok=True)
+
+    stats = sync_export(
+        out_dir,
+        "yolo",
+        images_dir,
+        items,
+        force=args.full,
+        link_mode=args.link_mode,
+        max_side=args.max_side,
+        quality=args.quality,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+    )
 
     yaml_path = out_dir / "dart-tip.yaml"
     with open(yaml_path, "w", encoding="utf-8") as f:
@@ -76,7 +89,8 @@ nc: 1
 names: ['dart_tip']
 """)
 
-    print(f"Exported {len(train_samples)} train / {len(val_samples)} val samples")
+    print(f"Exported {counts['train']} train / {counts['val']} val samples")
+    print(f"Changes: {format_stats(stats)}")
     print(f"Dataset YAML: {yaml_path}")
 
 
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""Board keypoint model family over input sizes and width multipliers.
+
+Every --sizes x --alphas variant is one train_board_kp.py run (unknown
+arguments are passed through, e.g. --epochs, --cached-features, --quantize
+int8). With --resize-epochs N only the largest size of each width trains for
+the full --epochs; the smaller sizes start from its best.keras and fine-tune
+for N epochs (the weights do not depend on the input size). Every exported
+TFLite file is then timed with bench_tflite.py, one at a time so the runs
+do not disturb each other.
+
+Only widths with ImageNet weights are offered (1.0 and 0.75); they also
+differ in block type, which family.json records per model.
+
+family.json lists each model (input size, width, quantization, file size,
+val MAE / score accuracy, CPU latency per thread count), the latency/MAE
+Pareto front per thread count, and per thread count and --mae-bars bar the
+fastest model that meets it. Thread counts stand in for device classes; the
+app picks from the front with its own bar.
+"""
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from pareto import cheapest_within, pareto_front
+from train_board_kp import PRETRAINED_ALPHAS
+
+
+SCRIPTS = Path(__file__).resolve().parent
+TRAIN_SCRIPT = SCRIPTS / "train_board_kp.py"
+BENCH_SCRIPT = SCRIPTS / "bench_tflite.py"
+MANIFEST_VERSION = 1
+ARCHITECTURES = {True: "minimalistic (ReLU, no squeeze-excite)", False: "hard-swish + squeeze-excite"}
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Train, export and benchmark a board keypoint model family")
+    p.add_argument("--data", required=True, nargs="+", help="Dataset roots, passed to every variant")
+    p.add_argument("--out", default="runs/board_kp_family", help="Family directory")
+    p.add_argument("--version", default=None, help="Family version (default: today); runs are VERSION_VARIANT")
+    p.add_argument("--sizes", type=int, nargs="+", default=[192, 224, 256, 320], help="Square input sizes")
+    p.add_argument(
+        "--alphas",
+        type=float,
+        nargs="+",
+        choices=sorted(PRETRAINED_ALPHAS),
+        default=[1.0, 0.75],
+        help="MobileNetV3Small width multipliers; 0.75 also uses the non-minimalistic blocks",
+    )
+    p.add_argument(
+        "--resize-epochs",
+        type=int,
+        default=0,
+        help="Fine-tune smaller sizes from the largest size of each width for N epochs (0 = train each fully)",
+    )
+    p.add_argument("--bench-threads", type=int, nargs="+", default=[1, 4], help="Interpreter threads to time")
+    p.add_argument("--bench-runs", type=int, default=50, help="Timed invokes per model and thread count")
+    p.add_argument("--metric", choices=["p50", "p90", "p99"], default="p50", help="Latency metric for picks")
+    p.add_argument(
+        "--mae-bars",
+        type=float,
+        nargs="+",
+        default=[0.01, 0.02, 0.03],
+        help="val MAE bars (normalized coordinates) to pick the fastest model for",
+    )
+    return p.parse_known_args(argv)
+
+
+def variant_id(img, alpha):
+    return f"img{img}_a{alpha:g}"
+
+
+def train_variant(args, train_args, img, alpha, run_version, init=None):
+    cmd = [
+        sys.executable,
+        str(TRAIN_SCRIPT),
+        "--data",
+        *args.data,
+        "--out",
+        args.out,
+        "--version",
+        run_version,
+        "--img",
+        str(img),
+        "--alpha",
+        str(alpha),
+        *train_args,
+    ]
+    if init is not None:
+        # After train_args: argparse keeps the last --epochs
+        cmd += ["--init-weights", str(init), "--epochs", str(args.resize_epochs)]
+    run_dir = Path(args.out) / run_version
+    run_dir.mkdir(parents=True, exist_ok=True)
+    with open(run_dir / "train.log", "w", encoding="utf-8") as log:
+        proc = subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT)
+    if proc.returncode != 0:
+        return None, f"train exit {proc.returncode}, see {run_dir / 'train.log'}"
+    with open(run_dir / "meta.json", "r", encoding="utf-8") as f:
+        return json.load(f), None
+
+
+def bench_model(path: Path, threads, runs):
+    """{threads: invoke_ms stats} from bench_tflite.py."""
+    out = path.with_suffix(".bench.json")
+    cmd = [
+        sys.executable,
+        str(BENCH_SCRIPT),
+        "--model",
+        str(path),
+        "--threads",
+        *[str(t) for t in threads],
+        "--runs",
+        str(runs),
+        "--out",
+        str(out),
+    ]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stdout[-500:] + proc.stderr[-500:])
+    with open(out, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    return {str(r["threads"]): r["invoke_ms"] for r in report["results"]}
+
+
+def pick_id(models, cost, bar):
+    pick = cheapest_within(models, cost, bar)
+    return pick["id"] if pick else None
+
+
+def latency(threads, metric):
+    """cost() for pareto.py: the model's latency at this thread count, None if not timed."""
+    return lambda m: m["latency_ms"].get(threads, {}).get(metric)
+
+
+def main(argv=None):
+    args, train_args = parse_args(argv)
+    for script in [TRAIN_SCRIPT, BENCH_SCRIPT]:
+        if not script.exists():
+            raise SystemExit(f"Missing {script}")
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    version = args.version or dt.date.today().isoformat()
+    sizes = sorted(set(args.sizes), reverse=True)
+    print(f"Family {version}: sizes {sizes} x alphas {args.alphas} ({len(sizes) * len(args.alphas)} variants)")
+    architectures = {f"{alpha:g}": ARCHITECTURES[PRETRAINED_ALPHAS[alpha]] for alpha in args.alphas}
+    mixed = len(set(architectures.values())) > 1
+    if mixed:
+        # Only these widths have ImageNet weights, and not with the same block type
+        print(f"Note: the alphas differ in block type as well as width: {architectures}")
+
+    start = time.perf_counter()
+    models, failed = [], []
+    meta = None
+    for alpha in args.alphas:
+        base = None
+        for img in sizes:
+            vid = variant_id(img, alpha)
+            run_version = f"{version}_{vid}"
+            init = base if args.resize_epochs > 0 else None
+            t0 = time.perf_counter()
+            run_meta, error = train_variant(args, train_args, img, alpha, run_version, init)
+            if error:
+                print(f"  {vid}: failed ({error})")
+                failed.append({"id": vid, "img": img, "alpha": alpha, "error": error})
+                continue
+            meta = run_meta
+            if base is None:
+                base = out_dir / run_version / "best.keras"
+            how = f"fine-tuned from {base.parent.name}" if init else "trained"
+            print(f"  {vid}: {how} in {time.perf_counter() - t0:.0f}s")
+            for mode, info in meta["variants"].items():
+                models.append(
+                    {
+                        "id": vid if mode == "none" else f"{vid}_{mode}",
+                        "img": img,
+                        "alpha": alpha,
+                        "minimalistic": meta["backbone"]["minimalistic"],
+                        "architecture": ARCHITECTURES[meta["backbone"]["minimalistic"]],
+                        "quantize": mode,
+                        "file": f"{run_version}/{info['file']}",
+                        "size_bytes": info["size_bytes"],
+                        "input": info["input"],
+                        "val_mae": info["val_mae"],
+                        "val_score_acc": info["val_score_acc"],
+                        "init": str(init) if init else None,
+                    }
+                )
+
+    # Benchmarks only after all training: a concurrent fit() would skew the timings
+    threads = [str(t) for t in args.bench_threads]
+    for m in models:
+        try:
+            m["latency_ms"] = bench_model(out_dir / m["file"], args.bench_threads, args.bench_runs)
+        except RuntimeError as exc:
+            print(f"  {m['id']}: benchmark failed ({exc})")
+            m["latency_ms"] = {}
+            continue
+        lat = ", ".join(f"{t}t {m['latency_ms'][t][args.metric]:.2f}" for t in threads if t in m["latency_ms"])
+        print(f"  {m['id']:24s} mae {m['val_mae']:.5f}  {m['size_bytes'] / 1e6:5.2f} MB  {args.metric} ms: {lat}")
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "family": version,
+        "created": dt.datetime.now().isoformat(timespec="seconds"),
+        "order": meta["order"] if meta else None,
+        "output": meta["output"] if meta else None,
+        "host": {"machine": platform.machine(), "cpu_count": os.cpu_count(), "python": platform.python_version()},
+        "bench": {"threads": args.bench_threads, "runs": args.bench_runs, "metric": args.metric},
+        "train_args": train_args,
+        "resize_epochs": args.resize_epochs,
+        "architectures": architectures,
+        "mixed_architectures": mixed,
+        "seconds": time.perf_counter() - start,
+        "models": sorted(models, key=lambda m: (m["img"], m["alpha"], m["quantize"])),
+        "pareto": {t: [m["id"] for m in pareto_front(models, latency(t, args.metric))] for t in threads},
+        "picks": {
+            t: {f"{bar:g}": pick_id(models, latency(t, args.metric), bar) for bar in args.mae_bars} for t in threads
+        },
+        "failed": failed,
+    }
+    with open(out_dir / "family.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    for t in threads:
+        print(f"Pareto front ({t} thread{'s' if t != '1' else ''}, {args.metric} latency vs val_mae):")
+        by_id = {m["id"]: m for m in models}
+        for mid in manifest["pareto"][t]:
+            m = by_id[mid]
+            print(f"  {mid:24s} {m['latency_ms'][t][args.metric]:7.2f} ms  mae {m['val_mae']:.5f}")
+        picks = ", ".join(f"mae<={bar}: {mid or '-'}" for bar, mid in manifest["picks"][t].items())
+        print(f"  fastest: {picks}")
+    print(f"Manifest: {out_dir / 'family.json'}")
+
+
+if __name__ == "__main__":
+    main()
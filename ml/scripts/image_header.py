@@ -0,0 +1,92 @@
+"""Image size and completeness from the file header, without decoding pixels.
+
+read_header() understands JPEG, PNG and WebP (the formats the exporters
+write). It reads the first bytes and, for JPEG, the marker segments up to the
+frame header to find the dimensions, plus a few bytes at the end to check the
+end marker (JPEG EOI, PNG IEND, RIFF size), so a file cut short by an
+interrupted copy or download is caught as well.
+"""
+import os
+import struct
+
+
+HEAD_BYTES = 32
+JPEG_TAIL_BYTES = 64
+PNG_IEND = b"\x00\x00\x00\x00IEND\xaeB`\x82"
+# SOFn markers carry the frame size; C4 (DHT), C8 (JPG) and CC (DAC) share the range
+JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+class HeaderError(ValueError):
+    pass
+
+
+def _jpeg_size(f):
+    # Walk the marker segments from SOI; seeks past EXIF/ICC blocks of any size
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2:
+            raise HeaderError("no JPEG frame header")
+        if marker[0] != 0xFF:
+            raise HeaderError(f"bad JPEG marker at byte {f.tell() - 2}")
+        code = marker[1]
+        if code == 0xFF:
+            f.seek(-1, os.SEEK_CUR)
+            continue
+        if code == 0x01 or 0xD0 <= code <= 0xD7:
+            continue
+        if code in (0xD9, 0xDA):
+            raise HeaderError("no JPEG frame header before scan data")
+        (length,) = struct.unpack(">H", f.read(2))
+        if code in JPEG_SOF:
+            height, width = struct.unpack(">HH", f.read(5)[1:])
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def _jpeg_complete(f, size):
+    f.seek(max(0, size - JPEG_TAIL_BYTES))
+    # Some encoders pad after EOI; a cut-off file has no EOI near the end at all
+    return b"\xff\xd9" in f.read(JPEG_TAIL_BYTES)
+
+
+def _webp_size(head):
+    if len(head) < 30:
+        raise HeaderError("truncated header")
+    chunk = head[12:16]
+    if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and head[20] == 0x2F:
+        (bits,) = struct.unpack("<I", head[21:25])
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        width = int.from_bytes(head[24:27], "little") + 1
+        height = int.from_bytes(head[27:30], "little") + 1
+        return width, height
+    raise HeaderError(f"unknown WebP chunk {chunk!r}")
+
+
+def read_header(path):
+    """(format, width, height, complete) of an image; raises HeaderError if unreadable."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        head = f.read(HEAD_BYTES)
+        try:
+            if head[:3] == b"\xff\xd8\xff":
+                width, height = _jpeg_size(f)
+                return "jpeg", width, height, _jpeg_complete(f, size)
+            if head[:8] == b"\x89PNG\r\n\x1a\n" and head[12:16] == b"IHDR":
+                width, height = struct.unpack(">II", head[16:24])
+                f.seek(max(0, size - len(PNG_IEND)))
+                return "png", width, height, f.read() == PNG_IEND
+            if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+                width, height = _webp_size(head)
+                (riff_size,) = struct.unpack("<I", head[4:8])
+                return "webp", width, height, riff_size + 8 <= size
+        except (struct.error, IndexError):
+            raise HeaderError("truncated header") from None
+    if not head:
+        raise HeaderError("empty file")
+    raise HeaderError("unknown image format")
@@ -0,0 +1,208 @@
+"""Columnar, memory-mapped cache of YOLO and keypoint label files.
+
+A labels dir is parsed in one pass into flat NumPy arrays (one row per label
+line) and saved under <labels_dir>/../.label_cache/<labels_dir name>/. Later
+loads memory-map the arrays instead of opening thousands of tiny .txt files,
+so remapping classes or picking calibration points are array operations.
+
+The cache key hashes (name, size, mtime_ns) of every label file, collected
+in the same scandir pass that lists them, so added, removed, renamed and
+rewritten-in-place labels (incremental re-exports, hand edits) all rebuild it.
+"""
+import hashlib
+import json
+import math
+import os
+from pathlib import Path
+
+try:
+    import numpy as np
+except Exception as exc:
+    raise SystemExit("numpy missing. Install with: pip install numpy") from exc
+
+
+CACHE_VERSION = 2
+CACHE_DIR = ".label_cache"
+
+
+def cache_dir_for(labels_dir: Path):
+    labels_dir = Path(labels_dir)
+    return labels_dir.parent / CACHE_DIR / labels_dir.name
+
+
+def label_files(labels_dir: Path, recursive):
+    """Sorted (key, path, size, mtime_ns); key is the path relative to labels_dir without .txt."""
+    files = []
+    stack = [("", str(labels_dir))]
+    while stack:
+        rel, path = stack.pop()
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir():
+                    if recursive and entry.name != CACHE_DIR:
+                        stack.append((f"{rel}{entry.name}/", entry.path))
+                elif entry.name.endswith(".txt"):
+                    st = entry.stat()
+                    files.append((f"{rel}{entry.name[:-4]}", entry.path, st.st_size, st.st_mtime_ns))
+    return sorted(files)
+
+
+def files_digest(files):
+    listing = "".join(f"{key}|{size}|{mtime_ns}\n" for key, _, size, mtime_ns in files)
+    return hashlib.sha1(listing.encode("utf-8")).hexdigest()
+
+
+def _load(cache_dir: Path, kind, key, names):
+    try:
+        with open(cache_dir / f"{kind}.json", "r", encoding="utf-8") as f:
+            if json.load(f) != key:
+                return None
+        return {name: np.load(cache_dir / f"{kind}.{name}.npy", mmap_mode="r") for name in names}
+    except (OSError, ValueError):
+        return None
+
+
+def _save(cache_dir: Path, kind, key, arrays):
+    """Arrays first, key last: a load only trusts arrays its key file vouches for."""
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        marker = cache_dir / f"{kind}.json"
+        if marker.exists():
+            marker.unlink()
+        pid = os.getpid()
+        for name, arr in arrays.items():
+            tmp_path = cache_dir / f"{kind}.{name}.{pid}.tmp.npy"
+            np.save(tmp_path, arr)
+            os.replace(tmp_path, cache_dir / f"{kind}.{name}.npy")
+        tmp_path = cache_dir / f"{kind}.{pid}.tmp.json"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(key, f)
+        os.replace(tmp_path, marker)
+    except OSError:
+        # Read-only dataset: still works, just without the cache
+        pass
+
+
+def _cached(labels_dir, kind, recursive, build, names, cache):
+    labels_dir = Path(labels_dir)
+    files = label_files(labels_dir, recursive)
+    key = {"version": CACHE_VERSION, "kind": kind, "files": len(files), "digest": files_digest(files)}
+    cache_dir = cache_dir_for(labels_dir)
+    if cache:
+        arrays = _load(cache_dir, kind, key, names)
+        if arrays is not None:
+            return arrays
+    arrays = build([(name, path) for name, path, _, _ in files])
+    if cache:
+        _save(cache_dir, kind, key, arrays)
+    return arrays
+
+
+def _to_float(text):
+    try:
+        return float(text)
+    except ValueError:
+        return math.nan
+
+
+class YoloLabels:
+    """All lines of a YOLO labels dir; rows are grouped by file in stem order.
+
+    stems[i]: file stem; stem[r], cls[r], xywh[r]: owning file, class and box of
+    row r (unparsable coordinates are NaN); tail(r): the line after the class
+    token, tokens joined by single spaces (keeps extra keypoint/polygon columns).
+    """
+
+    NAMES = ["stems", "stem", "cls", "xywh", "tail_offsets", "tail_bytes"]
+
+    def __init__(self, arrays):
+        for name in self.NAMES:
+            setattr(self, name, arrays[name])
+
+    def __len__(self):
+        return len(self.cls)
+
+    def tail(self, row):
+        start, end = self.tail_offsets[row], self.tail_offsets[row + 1]
+        return bytes(self.tail_bytes[start:end]).decode("utf-8")
+
+    def remap(self, mapping):
+        """(rows, new classes) of the rows whose class is a key of mapping {old: new}."""
+        size = max(max(mapping, default=-1), int(self.cls.max(initial=-1))) + 1
+        lut = np.full(size, -1, dtype=np.int32)
+        for old, new in mapping.items():
+            lut[old] = new
+        new_cls = np.where(self.cls >= 0, lut[np.maximum(self.cls, 0)], -1)
+        rows = np.flatnonzero(new_cls >= 0)
+        return rows, new_cls[rows]
+
+    def points_by_stem(self, classes):
+        """Per stem, the (x, y) of its rows in `classes`, in line order (list of (K, 2) arrays)."""
+        xy = self.xywh[:, :2]
+        rows = np.flatnonzero(np.isin(self.cls, list(classes)) & ~np.isnan(xy).any(axis=1))
+        counts = np.bincount(self.stem[rows], minlength=len(self.stems))
+        return np.split(np.asarray(xy[rows]), np.cumsum(counts)[:-1])
+
+
+def _build_yolo(files):
+    stems, stem_idx, classes, boxes, tails = [], [], [], [], []
+    for key, path in files:
+        idx = len(stems)
+        stems.append(key)
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        for line in lines:
+            parts = line.split()
+            if len(parts) < 5:
+                continue
+            try:
+                cls = int(float(parts[0]))
+            except (ValueError, OverflowError):
+                continue
+            stem_idx.append(idx)
+            classes.append(cls)
+            boxes.append([_to_float(v) for v in parts[1:5]])
+            tails.append(" ".join(parts[1:]).encode("utf-8"))
+    offsets = np.zeros(len(tails) + 1, dtype=np.int64)
+    np.cumsum([len(t) for t in tails], out=offsets[1:])
+    return {
+        "stems": np.array(stems, dtype=str),
+        "stem": np.array(stem_idx, dtype=np.int32),
+        "cls": np.array(classes, dtype=np.int32),
+        "xywh": np.array(boxes, dtype=np.float64).reshape(-1, 4),
+        "tail_offsets": offsets,
+        "tail_bytes": np.frombuffer(b"".join(tails), dtype=np.uint8),
+    }
+
+
+def yolo_labels(labels_dir: Path, cache=True):
+    """YoloLabels for the .txt files directly in labels_dir."""
+    return YoloLabels(_cached(labels_dir, "yolo", False, _build_yolo, YoloLabels.NAMES, cache))
+
+
+def _build_values(count):
+    def build(files):
+        keys, rows = [], []
+        for key, path in files:
+            with open(path, "r", encoding="utf-8") as f:
+                raw = f.read().split()
+            if len(raw) != count:
+                continue
+            try:
+                rows.append([float(v) for v in raw])
+            except ValueError:
+                continue
+            keys.append(key)
+        return {"keys": np.array(keys, dtype=str), "values": np.array(rows, dtype=np.float64).reshape(-1, count)}
+
+    return build
+
+
+def value_labels(labels_dir: Path, count=8, cache=True):
+    """(keys, values) for files holding exactly `count` floats, searched recursively.
+
+    keys are paths relative to labels_dir without .txt ('shard_000/x'); values
+    is (N, count). This is the board keypoint label format (8 floats).
+    """
+    arrays = _cached(labels_dir, f"values{count}", True, _build_values(count), ["keys", "values"], cache)
+    return arrays["keys"], arrays["values"]
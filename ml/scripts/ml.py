@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Single entry point for the ml/scripts tools: ml.py COMMAND [ARGS].
+
+Only the chosen command's module is imported, so label-only commands never
+pull in NumPy, TensorFlow or the Roboflow SDK and start in a few tens of ms
+(guarded by ml/tests/test_cli_startup.py). Every command stays runnable as
+its own script as well.
+
+This dispatcher script is the `ml` entry point: ml/ is not an installable
+package, and the scripts import each other from ml/scripts on sys.path.
+"""
+import argparse
+import importlib
+import sys
+
+
+# command -> (module, summary)
+COMMANDS = {
+    "export-yolo": ("export_yolo", "App captures -> YOLO dataset"),
+    "export-kp": ("export_board_kp", "App captures -> board keypoint dataset"),
+    "export-kp-yolo": ("export_board_kp_from_yolo", "YOLO keypoint boxes -> board keypoint dataset"),
+    "remap": ("remap_yolo", "Remap YOLO class ids"),
+    "convert-index": ("convert_index", "index.json -> sharded JSONL index"),
+    "dedup": ("dedup_dataset", "Perceptual-hash near-duplicate exclusion list"),
+    "scan": ("scan_dataset", "Header-only image/label integrity scan and exclusion list"),
+    "pack": ("pack_board_kp", "Pre-decode a board keypoint dataset into shards"),
+    "train": ("train_board_kp", "Train the board keypoint model (TensorFlow)"),
+    "sweep": ("sweep_board_kp", "Hyperparameter sweep over train"),
+    "family": ("family_board_kp", "Multi-resolution/width model family with latency Pareto report"),
+    "validate": ("validate_board_kp", "Validate a TFLite board keypoint model"),
+    "bench": ("bench_tflite", "TFLite latency/throughput benchmark"),
+    "replay-diff": ("replay_diff_detect", "Replay detectDartFromDiff on a dataset"),
+    "download": ("roboflow_download", "Download a Roboflow dataset"),
+}
+
+# No heavy imports at all; ml/tests/test_cli_startup.py holds these to the budget
+LABEL_COMMANDS = ["export-yolo", "export-kp", "export-kp-yolo", "remap", "convert-index", "scan"]
+
+
+def build_parser():
+    width = max(len(name) for name in COMMANDS)
+    listing = "\n".join(f"  {name:{width}s}  {summary}" for name, (_, summary) in COMMANDS.items())
+    p = argparse.ArgumentParser(
+        prog="ml",
+        description="Dataset, training and model tools (run `ml COMMAND --help` for options)",
+        epilog=f"commands:\n{listing}",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    p.add_argument("command", choices=COMMANDS, metavar="COMMAND", help="one of the commands below")
+    p.add_argument("args", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    return p
+
+
+def load_command(name):
+    return importlib.import_module(COMMANDS[name][0])
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    module = load_command(args.command)
+    # argparse derives prog from argv[0]; make sub-command help read `ml train ...`
+    sys.argv[0] = f"ml {args.command}"
+    return module.main(args.args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Pack a board keypoint dataset into pre-decoded, pre-resized uint8 shards.
+
+Output layout (consumed by train_board_kp.py when --data points at it):
+  <out>/pack.json
+  <out>/<split>/images_00000.npy   uint8 (N, img, img, 3), memory-mappable
+  <out>/<split>/labels_00000.npy   float32 (N, 8)
+  <out>/<split>/paths_00000.txt    source image path per row
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+try:
+    import numpy as np
+except Exception as exc:
+    raise SystemExit("numpy missing. Install with: pip install numpy") from exc
+
+from board_kp_data import samples_fingerprint
+from dataset_exclude import add_exclude_args, load_excluded
+from tflite_utils import import_tf
+
+
+PACK_VERSION = 1
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Pack board keypoint dataset into decoded uint8 shards")
+    p.add_argument("--data", required=True, help="Dataset root from export_board_kp.py")
+    p.add_argument("--out", required=True, help="Packed dataset root")
+    p.add_argument("--img", type=int, default=320, help="Target square input size")
+    p.add_argument("--shard-size", type=int, default=1024, help="Samples per shard")
+    add_exclude_args(p)
+    return p.parse_args(argv)
+
+
+def decode_resize(path, img_size):
+    # Same decode/resize as board_kp_training.sample_dataset, quantized back to uint8
+    tf = import_tf()
+    data = tf.io.read_file(path)
+    img = tf.image.decode_image(data, channels=3, expand_animations=False)
+    img = tf.image.convert_image_dtype(img, tf.float32)
+    img = tf.image.resize(img, [img_size, img_size], method=tf.image.ResizeMethod.BILINEAR)
+    return tf.cast(tf.round(tf.clip_by_value(img, 0.0, 1.0) * 255.0), tf.uint8)
+
+
+def pack_split(samples, out_dir: Path, img_size, shard_size):
+    tf = import_tf()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    shards = []
+    paths = [s[0] for s in samples]
+    ds = tf.data.Dataset.from_tensor_slices(paths)
+    ds = ds.map(lambda p: decode_resize(p, img_size), num_parallel_calls=tf.data.AUTOTUNE)
+    ds = ds.batch(shard_size).prefetch(2)
+
+    for shard_idx, batch in enumerate(ds.as_numpy_iterator()):
+        start = shard_idx * shard_size
+        chunk = samples[start : start + len(batch)]
+        name = f"{shard_idx:05d}"
+        images_path = out_dir / f"images_{name}.npy"
+        labels_path = out_dir / f"labels_{name}.npy"
+        np.save(images_path, batch)
+        np.save(labels_path, np.asarray([s[1] for s in chunk], dtype=np.float32))
+        with open(out_dir / f"paths_{name}.txt", "w", encoding="utf-8") as f:
+            f.writelines(f"{s[0]}\n" for s in chunk)
+        shards.append({"images": images_path.name, "labels": labels_path.name, "count": len(batch)})
+    return shards
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    data_root = Path(args.data)
+    out_root = Path(args.out)
+    out_root.mkdir(parents=True, exist_ok=True)
+
+    meta = {
+        "version": PACK_VERSION,
+        "format": "npy-uint8",
+        "img": args.img,
+        "source": str(data_root),
+        "splits": {},
+    }
+    from board_kp_training import DataSource
+
+    source = DataSource(data_root, args.img, load_excluded(args.exclude))
+    if source.packed:
+        raise SystemExit(f"{data_root} is already packed")
+    for split in ["train", "val"]:
+        samples = source.samples(split)
+        if not samples:
+            print(f"{split}: no samples, skipped")
+            continue
+
+        start = time.perf_counter()
+        src_bytes = sum(Path(s[0]).stat().st_size for s in samples)
+        shards = pack_split(samples, out_root / split, args.img, args.shard_size)
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        meta["splits"][split] = {
+            "count": len(samples),
+            "shards": shards,
+            "fingerprint": samples_fingerprint(samples, args.img),
+        }
+        print(
+            f"{split}: packed {len(samples)} samples in {len(shards)} shards "
+            f"({len(samples) / elapsed:.1f} samples/s, {src_bytes / elapsed / 1e6:.1f} MB/s source read)"
+        )
+
+    with open(out_root / "pack.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    print(f"Packed dataset: {out_root}")
+
+
+if __name__ == "__main__":
+    main()
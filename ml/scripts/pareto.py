@@ -0,0 +1,39 @@
+"""Cost vs val_mae model selection shared by the sweep and family reports.
+
+cost(item) is what the app pays for a model (TFLite size, latency); items
+whose cost or error is None or NaN (failed benchmark, failed eval) are left
+out. Ties are broken by error, then by input order, so reports are stable.
+"""
+import math
+
+
+def _val_mae(item):
+    return item["val_mae"]
+
+
+def _scored(items, cost, error):
+    scored = []
+    for i, item in enumerate(items):
+        c, e = cost(item), error(item)
+        if c is None or e is None or math.isnan(c) or math.isnan(e):
+            continue
+        scored.append((c, e, i, item))
+    return sorted(scored, key=lambda s: s[:3])
+
+
+def pareto_front(items, cost, error=_val_mae):
+    """Items no other item beats on both cost and error, cheapest first."""
+    front, best = [], math.inf
+    for _, e, _, item in _scored(items, cost, error):
+        if e < best:
+            front.append(item)
+            best = e
+    return front
+
+
+def cheapest_within(items, cost, bar, error=_val_mae):
+    """The lowest-cost item with error <= bar, or None."""
+    for _, e, _, item in _scored(items, cost, error):
+        if e <= bar:
+            return item
+    return None
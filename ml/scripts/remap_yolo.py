@@ -1,16 +1,19 @@
 #!/usr/bin/env python3
 import argparse
-import os
-import shutil
+from functools import partial
 from pathlib import Path
 
+from dataset_exclude import add_exclude_args, is_excluded, load_excluded
+from dataset_link import add_link_args, add_resize_args, export_image
+from dataset_pool import add_worker_args, index_images, run_chunked
+
 try:
     import yaml
 except Exception:
     yaml = None
 
 
-def parse_args():
+def parse_args(argv=None):
     p = argparse.ArgumentParser(description="Remap/Filter YOLO dataset classes")
     p.add_argument("--in", dest="src", required=True, help="Input dataset root")
     p.add_argument("--out", dest="dst", required=True, help="Output dataset root")
@@ -20,7 +23,11 @@ def parse_args():
         required=True,
         help="Class map like 'tip:dart_tip,dart:dart_tip' (old_name:new_name)",
     )
-    return p.parse_args()
+    add_link_args(p)
+    add_resize_args(p)
+    add_exclude_args(p)
+    add_worker_args(p)
+    return p.parse_args(argv)
 
 
 def load_names(src: Path):
@@ -50,13 +57,71 @@ def parse_map(s: str):
     return out
 
 
-def main():
-    args = parse_args()
+def remap_lines(table, old_idx_to_new_idx):
+    """{stem: [remapped label lines]} for stems with at least one kept line."""
+    rows, new_cls = table.remap(old_idx_to_new_idx)
+    stems = table.stems
+    out = {}
+    for row, cls, stem in zip(rows.tolist(), new_cls.tolist(), table.stem[rows].tolist()):
+        out.setdefault(str(stems[stem]), []).append(f"{cls} {table.tail(row)}\n")
+    return out
+
+
+def remap_sample(task, out_dir: Path, link_mode="copy", max_side=0, quality=90):
+    stem, img_file, out_lines = task
+    export_image(img_file, out_dir / "images" / img_file.name, link_mode, max_side, quality)
+    with open(out_dir / "labels" / f"{stem}.txt", "w", encoding="utf-8") as f:
+        f.writelines(out_lines)
+    return True
+
+
+def remap_split(
+    split_dir: Path,
+    out_dir: Path,
+    old_idx_to_new_idx,
+    link_mode="copy",
+    workers=1,
+    chunk_size=256,
+    excluded=frozenset(),
+    max_side=0,
+    quality=90,
+):
+    images_dir = split_dir / "images"
+    labels_dir = split_dir / "labels"
+    if not images_dir.exists() or not labels_dir.exists():
+        return 0
+    (out_dir / "images").mkdir(parents=True, exist_ok=True)
+    (out_dir / "labels").mkdir(parents=True, exist_ok=True)
+
+    # Imported here so label-only `--help` stays free of NumPy (see ml.py)
+    from label_cache import yolo_labels
+
+    images = index_images(images_dir)
+    lines = remap_lines(yolo_labels(labels_dir), old_idx_to_new_idx)
+    tasks = [
+        (stem, images[stem], out_lines)
+        for stem, out_lines in lines.items()
+        if stem in images and not is_excluded(images[stem], excluded)
+    ]
+    func = partial(
+        remap_sample,
+        out_dir=out_dir,
+        link_mode=link_mode,
+        max_side=max_side,
+        quality=quality,
+    )
+    results = run_chunked(func, tasks, workers=workers, chunk_size=chunk_size, desc=split_dir.name)
+    return sum(1 for ok in results if ok)
+
+
+def main(argv=None):
+    args = parse_args(argv)
     src = Path(args.src)
     dst = Path(args.dst)
     dst.mkdir(parents=True, exist_ok=True)
 
     class_map = parse_map(args.class_map)
+    excluded = load_excluded(args.exclude)
 
     names = load_names(src)
     if names is None:
@@ -73,54 +138,22 @@ def main():
             new_names.append(new_name)
         old_idx_to_new_idx[old_name_to_idx[old_name]] = new_names.index(new_name)
 
-    def remap_split(split_dir: Path, out_dir: Path):
-        images_dir = split_dir / "images"
-        labels_dir = split_dir / "labels"
-        if not images_dir.exists() or not labels_dir.exists():
-            return
-        (out_dir / "images").mkdir(parents=True, exist_ok=True)
-        (out_dir / "labels").mkdir(parents=True, exist_ok=True)
-
-        for label_file in labels_dir.glob("*.txt"):
-            rel = label_file.stem
-            out_label = out_dir / "labels" / f"{rel}.txt"
-            out_lines = []
-            with open(label_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    parts = line.strip().split()
-                    if len(parts) < 5:
-                        continue
-                    try:
-                        cls = int(float(parts[0]))
-                    except Exception:
-                        continue
-                    if cls not in old_idx_to_new_idx:
-                        continue
-                    new_cls = old_idx_to_new_idx[cls]
-                    out_lines.append(" ".join([str(new_cls)] + parts[1:]) + "\n")
-
-            if not out_lines:
-                continue
-
-            # copy image
-            img_file = None
-            for ext in [".jpg", ".jpeg", ".png", ".webp"]:
-                candidate = images_dir / f"{rel}{ext}"
-                if candidate.exists():
-                    img_file = candidate
-                    break
-            if img_file is None:
-                continue
-
-            shutil.copy2(img_file, out_dir / "images" / img_file.name)
-            with open(out_label, "w", encoding="utf-8") as f:
-                f.writelines(out_lines)
-
     # Roboflow exports use train/valid/test
     for split in ["train", "valid", "val", "test"]:
         split_dir = src / split
         if split_dir.exists():
-            remap_split(split_dir, dst / split)
+            kept = remap_split(
+                split_dir,
+                dst / split,
+                old_idx_to_new_idx,
+                link_mode=args.link_mode,
+                workers=args.workers,
+                chunk_size=args.chunk_size,
+                excluded=excluded,
+                max_side=args.max_side,
+                quality=args.quality,
+            )
+            print(f"  {split}: {kept} samples written")
 
     # write new yaml
     yaml_path = dst / "data.yaml"
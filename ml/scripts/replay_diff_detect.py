@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Replay the app's diff-based dart detector over captured frame pairs.
+
+DatasetSample does not record which frame the app diffed against, so pairs
+are approximated from index.json: each annotated sample is paired with the
+previous capture (by capturedAt) with the same settingsSnapshot and image
+size, assuming the app re-baselined after the previous hit. Captures taken
+with a reset baseline in between are paired with the wrong frame.
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+try:
+    import numpy as np
+    from PIL import Image
+except Exception as exc:
+    raise SystemExit("numpy/Pillow missing. Install with: pip install numpy pillow") from exc
+
+from board_lut import BoardLutCache, compute_tables, score_at
+from dataset_index import iter_samples
+from diff_detect import detect_dart_from_diff, sample_step
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Replay detectDartFromDiff over index.json frame pairs")
+    p.add_argument("--index", required=True, help="index.json, a .jsonl file or a sharded index directory")
+    p.add_argument("--images-dir", required=True, help="Directory with sample images")
+    p.add_argument("--threshold", type=float, default=28)
+    p.add_argument("--min-count", type=int, default=25)
+    p.add_argument("--max-count", type=int, default=1800)
+    p.add_argument("--sample-size", type=int, default=200)
+    p.add_argument("--workers", type=int, default=1, help="Worker processes")
+    p.add_argument("--out", default=None, help="Write per-pair results JSON")
+    p.add_argument("--lut-cache", default=None, help="Directory for cached board masks / polar LUTs")
+    p.add_argument("--lut-cache-mb", type=int, default=512, help="Size budget of the LUT cache")
+    p.add_argument(
+        "--lut-quantum",
+        type=float,
+        default=1e-4,
+        help="Calibration quantization step (normalized) for LUT cache keys",
+    )
+    return p.parse_args(argv)
+
+
+def calibration_key(sample):
+    snap = sample.get("settingsSnapshot") or {}
+    return json.dumps([snap, sample.get("width"), sample.get("height")], sort_keys=True)
+
+
+def build_pairs(samples):
+    """(baseline fileName, sample) for every annotated sample with an earlier matching capture."""
+    ordered = sorted((s for s in samples if s.get("fileName")), key=lambda s: s.get("capturedAt") or "")
+    pairs = []
+    previous = {}
+    for sample in ordered:
+        key = calibration_key(sample)
+        baseline = previous.get(key)
+        if baseline is not None and sample.get("annotation"):
+            pairs.append((baseline["fileName"], sample))
+        previous[key] = sample
+    return pairs
+
+
+_lut_cache = None
+
+
+def get_lut_cache(lut_args):
+    # One cache object per (worker) process; entries are shared on disk
+    global _lut_cache
+    if _lut_cache is None:
+        root, max_mb, quantum = lut_args
+        _lut_cache = BoardLutCache(root, max_bytes=max_mb * 1024 * 1024, quantum=quantum)
+    return _lut_cache
+
+
+def load_rgb(path):
+    with Image.open(path) as img:
+        return np.asarray(img.convert("RGB"))
+
+
+def replay_pair(pair, images_dir: Path, options, lut_args=None):
+    baseline_name, sample = pair
+    baseline = load_rgb(images_dir / baseline_name)
+    current = load_rgb(images_dir / sample["fileName"])
+    settings = sample.get("settingsSnapshot") or {}
+    height, width = current.shape[:2]
+    result = {"fileName": sample["fileName"], "baseline": baseline_name}
+
+    step = sample_step(width, height, options["sample_size"])
+    if lut_args is not None:
+        cache = get_lut_cache(lut_args)
+        misses = cache.misses
+        tables = cache.get(settings, width, height, step)
+        result["lut"] = "miss" if cache.misses > misses else "hit"
+    else:
+        tables = compute_tables(settings, width, height, step)
+
+    det = detect_dart_from_diff(baseline, current, settings, mask=np.asarray(tables[0]), **options)
+    result["detection"] = det
+    ann = sample["annotation"]
+    rotation = settings.get("rotationDeg", 0.0)
+    result["truth_score"] = score_at(tables, ann["x"], ann["y"], width, height, step, rotation)
+    if det is not None:
+        result["error_px"] = float(np.hypot((det["x"] - ann["x"]) * width, (det["y"] - ann["y"]) * height))
+        result["score"] = score_at(tables, det["x"], det["y"], width, height, step, rotation)
+    return result
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    pairs = build_pairs(list(iter_samples(args.index)))
+    if not pairs:
+        print("No annotated baseline/current pairs found in index.json")
+        return
+
+    options = {
+        "threshold": args.threshold,
+        "min_count": args.min_count,
+        "max_count": args.max_count,
+        "sample_size": args.sample_size,
+    }
+    lut_args = (args.lut_cache, args.lut_cache_mb, args.lut_quantum) if args.lut_cache else None
+    func = partial(replay_pair, images_dir=Path(args.images_dir), options=options, lut_args=lut_args)
+    start = time.perf_counter()
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(func, pairs, chunksize=16))
+    else:
+        results = [func(pair) for pair in pairs]
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    errors = np.asarray([r["error_px"] for r in results if "error_px" in r])
+    print(f"Pairs: {len(results)} ({len(results) / elapsed:.1f} frames/s)")
+    print(f"Detected: {len(errors)} ({len(errors) / len(results):.1%})")
+    if len(errors):
+        p50, p90, p95 = np.percentile(errors, [50, 90, 95])
+        print(
+            f"Tip error px: mean {errors.mean():.1f}, p50 {p50:.1f}, p90 {p90:.1f}, "
+            f"p95 {p95:.1f}, max {errors.max():.1f}"
+        )
+    scored = [r for r in results if "score" in r]
+    if scored:
+        same = sum(1 for r in scored if r["score"] == r["truth_score"])
+        print(f"Scored like the annotation (segment + ring): {same}/{len(scored)} ({same / len(scored):.1%})")
+    if lut_args:
+        hits = sum(1 for r in results if r.get("lut") == "hit")
+        print(f"LUT cache: {hits} hits / {len(results) - hits} misses ({args.lut_cache})")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"options": options, "results": results}, f, indent=2)
+        print(f"Results: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
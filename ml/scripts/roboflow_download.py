@@ -1,17 +1,21 @@
 #!/usr/bin/env python3
+"""Download a Roboflow dataset version through the local archive mirror.
+
+The export archive is cached by content in --mirror (see dataset_mirror.py):
+re-runs verify the cached archive's SHA-256 and skip the download, an
+interrupted download resumes, and extraction runs on a thread pool. --source
+swaps Roboflow for another mirror (http URL) or a local directory, which is
+also how the caching is tested offline.
+"""
 import argparse
 import os
+import time
 from pathlib import Path
 
-try:
-    from roboflow import Roboflow
-except Exception as exc:
-    raise SystemExit(
-        "roboflow package missing. Install with: pip install roboflow"
-    ) from exc
+from dataset_mirror import DatasetKey, Mirror, extract, make_backend
 
 
-def parse_args():
+def parse_args(argv=None):
     p = argparse.ArgumentParser(description="Download a Roboflow Universe dataset")
     p.add_argument("--workspace", required=True, help="Roboflow workspace slug")
     p.add_argument("--project", required=True, help="Roboflow project slug")
@@ -19,22 +23,45 @@ def parse_args():
     p.add_argument("--format", default="yolov8", help="Export format (yolov8, yolo, etc.)")
     p.add_argument("--out", required=True, help="Output directory")
     p.add_argument("--api-key", default=None, help="Roboflow API key (or env ROBOFLOW_API_KEY)")
-    return p.parse_args()
+    p.add_argument(
+        "--mirror",
+        default=os.getenv("ROBOFLOW_MIRROR", "ml/external/.mirror"),
+        help="Archive mirror root (or env ROBOFLOW_MIRROR)",
+    )
+    p.add_argument(
+        "--source",
+        default="roboflow",
+        help="'roboflow', a mirror base URL or a local dir with WORKSPACE/PROJECT/VERSION/FORMAT.zip",
+    )
+    p.add_argument("--sha256", default=None, help="Expected archive SHA-256 (pins the dataset version)")
+    p.add_argument("--threads", type=int, default=8, help="Extraction threads")
+    p.add_argument("--force", action="store_true", help="Download and extract again even if cached")
+    return p.parse_args(argv)
 
 
-def main():
-    args = parse_args()
-    api_key = args.api_key or os.getenv("ROBOFLOW_API_KEY")
-    if not api_key:
-        raise SystemExit("Missing API key. Set ROBOFLOW_API_KEY or pass --api-key")
+def main(argv=None):
+    args = parse_args(argv)
+    key = DatasetKey(args.workspace, args.project, args.version, args.format)
+    mirror = Mirror(args.mirror)
 
-    rf = Roboflow(api_key=api_key)
-    project = rf.workspace(args.workspace).project(args.project)
-    version = project.version(args.version)
-    dataset = version.download(args.format, location=args.out)
+    start = time.perf_counter()
+    blob = None if args.force else mirror.cached(key, args.sha256)
+    if blob is None:
+        backend = make_backend(args.source, args.api_key or os.getenv("ROBOFLOW_API_KEY"))
+        print(f"Fetching {key} from {args.source}")
+        blob, _ = mirror.fetch(key, backend, args.sha256, force=True)
+    else:
+        print(f"Cached: {key} ({blob.stat().st_size / 1e6:.1f} MB, checksum ok)")
+    sha256 = blob.stem
 
-    out_dir = Path(dataset.location)
-    print(f"Downloaded to: {out_dir}")
+    out_dir = Path(args.out)
+    files = extract(blob, out_dir, sha256, threads=args.threads, force=args.force)
+    if files:
+        print(f"Extracted {files} files")
+    else:
+        print("Output already up to date")
+    print(f"Archive: {blob} (sha256 {sha256})")
+    print(f"Downloaded to: {out_dir} in {time.perf_counter() - start:.1f}s")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,122 @@
+"""Structured run metrics for train_board_kp.py (written to run_dir/metrics.json).
+
+Stages are timed with RunMetrics.stage(); peak RSS is sampled when each
+stage ends. Keras fit() pulls batches inside the compiled train step, so the
+input wait of a single step cannot be observed directly. Instead the train
+pipeline is timed on its own for a few batches (probe_input) and compared
+with the per-step time StepTimer (board_kp_training.py) sees during fit:
+once producing a batch takes about as long as a step, prefetch can no longer
+hide it and the run is input-bound. No TensorFlow import here, so
+train_board_kp.py can add the arguments before loading it.
+"""
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+METRICS_VERSION = 1
+# input_share at or above this counts as input-bound
+INPUT_BOUND_SHARE = 0.9
+
+
+def add_metrics_args(p):
+    p.add_argument(
+        "--input-probe-batches",
+        type=int,
+        default=20,
+        help="Batches to time the train input pipeline alone before fit (0 = skip)",
+    )
+    p.add_argument(
+        "--profile-steps",
+        default=None,
+        help="START:STOP global train steps to capture with the TF profiler (e.g. 10:20)",
+    )
+    p.add_argument("--profile-dir", default=None, help="Profiler log dir (default: <run_dir>/profile)")
+
+
+def parse_steps(spec):
+    """'10:20' -> (10, 20)."""
+    start, sep, stop = (spec or "").partition(":")
+    try:
+        start, stop = int(start), int(stop)
+    except ValueError:
+        raise SystemExit(f"--profile-steps expects START:STOP, got {spec!r}") from None
+    if not sep or start < 0 or stop <= start:
+        raise SystemExit(f"--profile-steps expects START:STOP with STOP > START, got {spec!r}")
+    return start, stop
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def ms_stats(seconds):
+    if not seconds:
+        return None
+    ms = np.asarray(seconds) * 1000
+    return {
+        "count": len(ms),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p90_ms": float(np.percentile(ms, 90)),
+        "max_ms": float(ms.max()),
+    }
+
+
+class RunMetrics:
+    def __init__(self):
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self.stages = {}
+        self.data = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block; repeated names accumulate."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+            entry["seconds"] += time.perf_counter() - start
+            entry["calls"] += 1
+            entry["peak_rss_mb"] = peak_rss_mb()
+
+    def write(self, path):
+        report = {
+            "version": METRICS_VERSION,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "total_seconds": time.perf_counter() - self._t0,
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": self.stages,
+            **self.data,
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        os.replace(tmp_path, path)
+        return report
+
+
+def probe_input(ds, batches):
+    """Time `batches` batches of ds with no model attached; returns ms stats (first batch excluded)."""
+    times = []
+    it = iter(ds)
+    start = time.perf_counter()
+    for _ in range(batches + 1):
+        try:
+            next(it)
+        except StopIteration:
+            break
+        now = time.perf_counter()
+        times.append(now - start)
+        start = now
+    # The first batch pays for pipeline start-up (shuffle buffer fill, thread pools)
+    return ms_stats(times[1:])
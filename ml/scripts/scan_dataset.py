@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""Integrity scan of app captures, board keypoint and YOLO datasets.
+
+Images are checked from their headers only (image_header.py: format, size,
+end marker), labels by parsing the small .txt files; both run on a thread
+pool, so a few hundred thousand files take seconds rather than a decode
+pass. Checks:
+  - app index: image missing, unreadable or truncated, size differs from
+    DatasetSample width/height
+  - board keypoint labels: exactly 8 floats in 0..1
+  - YOLO labels: per line class id >= 0 and x y w h in 0..1 (w, h > 0);
+    extra keypoint/segment columns must be numeric
+  - orphans: images without a label, labels without an image
+The output JSON lists every issue and has an "exclude" array (images that
+would be used but are broken) in the format the exporters and
+train_board_kp.py take via --exclude. Orphans are reported only: nothing
+reads them anyway.
+"""
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from dataset_index import iter_samples
+from dataset_pool import IMAGE_EXTS
+from image_header import HeaderError, read_header
+
+
+SPLITS = ["train", "valid", "val", "test"]
+KP_VALUES = 8
+# Listed in the report but not excluded (no image that training would read)
+REPORT_ONLY = {"orphan_image", "orphan_label"}
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Header-only integrity scan of image/label datasets")
+    p.add_argument("--index", default=None, help="App index (index.json, .jsonl or shard dir)")
+    p.add_argument("--images-dir", default=None, help="Images for --index")
+    p.add_argument("--kp", nargs="*", default=[], help="Board keypoint dataset roots (8-float labels)")
+    p.add_argument("--yolo", nargs="*", default=[], help="YOLO dataset roots (e.g. Roboflow downloads)")
+    p.add_argument("--out", required=True, help="Output JSON (issues + exclude list)")
+    p.add_argument(
+        "--threads",
+        type=int,
+        default=min(32, (os.cpu_count() or 1) * 4),
+        help="Reader threads (file reads release the GIL)",
+    )
+    p.add_argument("--chunk-size", type=int, default=512, help="Files per thread task")
+    args = p.parse_args(argv)
+    if not args.index and not args.kp and not args.yolo:
+        p.error("pass --index, --kp and/or --yolo")
+    if args.index and not args.images_dir:
+        p.error("--index needs --images-dir")
+    return args
+
+
+def list_files(root: Path, exts):
+    """Map relative path without suffix ('shard_000/x') -> path, recursively, via scandir."""
+    found = {}
+    stack = [(str(root), "")]
+    while stack:
+        dir_path, prefix = stack.pop()
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                if entry.is_dir():
+                    if not entry.name.startswith("."):
+                        stack.append((entry.path, f"{prefix}{entry.name}/"))
+                    continue
+                stem, ext = os.path.splitext(entry.name)
+                if ext.lower() in exts:
+                    found.setdefault(prefix + stem, entry.path)
+    return found
+
+
+def split_dirs(root: Path):
+    """(split, images dir, labels dir) in either dataset layout (see board_kp_data.find_split_dirs)."""
+    out = []
+    for split in SPLITS:
+        for img_dir, lbl_dir in [
+            (root / "images" / split, root / "labels" / split),
+            (root / split / "images", root / split / "labels"),
+        ]:
+            if img_dir.is_dir() and lbl_dir.is_dir():
+                out.append((split, img_dir, lbl_dir))
+                break
+    return out
+
+
+def check_image(task):
+    """task = (path, expected (w, h) or None) -> (kind, detail) or None."""
+    path, expected = task
+    try:
+        fmt, width, height, complete = read_header(path)
+    except FileNotFoundError:
+        return "missing_image", "file not found"
+    except (HeaderError, OSError) as exc:
+        return "unreadable_image", str(exc)
+    if not complete:
+        return "truncated_image", f"{fmt} without end marker"
+    if expected and (width, height) != expected:
+        detail = f"header {width}x{height}, index {expected[0]}x{expected[1]}"
+        if (height, width) == expected:
+            detail += " (transposed)"
+        return "size_mismatch", detail
+    return None
+
+
+def _floats(tokens):
+    try:
+        values = [float(v) for v in tokens]
+    except ValueError:
+        return None
+    return values if all(math.isfinite(v) for v in values) else None
+
+
+def in_unit_range(values):
+    return all(0.0 <= v <= 1.0 for v in values)
+
+
+def check_kp_label(path):
+    with open(path, "r", encoding="utf-8") as f:
+        tokens = f.read().split()
+    if len(tokens) != KP_VALUES:
+        return "bad_label", f"{len(tokens)} values, expected {KP_VALUES}"
+    values = _floats(tokens)
+    if values is None:
+        return "bad_label", "non-numeric or non-finite value"
+    if not in_unit_range(values):
+        return "bad_label", "value outside 0..1"
+    return None
+
+
+def check_yolo_label(path):
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    for line_no, line in enumerate(lines, 1):
+        tokens = line.split()
+        if not tokens:
+            continue
+        if len(tokens) < 5:
+            return "bad_label", f"line {line_no}: {len(tokens)} values, expected class x y w h"
+        values = _floats(tokens)
+        if values is None:
+            return "bad_label", f"line {line_no}: non-numeric or non-finite value"
+        if values[0] < 0 or values[0] != int(values[0]):
+            return "bad_label", f"line {line_no}: bad class id {tokens[0]}"
+        if not in_unit_range(values[1:5]) or values[3] <= 0 or values[4] <= 0:
+            return "bad_label", f"line {line_no}: box outside 0..1"
+    return None
+
+
+def _run_chunk(func, chunk):
+    return [func(item) for item in chunk]
+
+
+def run_threaded(func, items, threads, chunk_size):
+    chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return [r for results in pool.map(_run_chunk, [func] * len(chunks), chunks) for r in results]
+
+
+class Scan:
+    def __init__(self, threads, chunk_size):
+        self.threads = threads
+        self.chunk_size = chunk_size
+        self.issues = []
+        self.images = 0
+        self.labels = 0
+
+    def add(self, kind, path, detail=None, image=None):
+        issue = {"kind": kind, "path": str(path)}
+        if detail:
+            issue["detail"] = detail
+        if image and image != path:
+            issue["image"] = str(image)
+        self.issues.append(issue)
+
+    def check_images(self, tasks):
+        self.images += len(tasks)
+        for (path, _), result in zip(tasks, run_threaded(check_image, tasks, self.threads, self.chunk_size)):
+            if result:
+                self.add(result[0], path, result[1])
+
+    def scan_index(self, index, images_dir: Path):
+        referenced = set()
+        tasks = []
+        for sample in iter_samples(index):
+            name = sample.get("fileName")
+            if not name or name in referenced:
+                continue
+            referenced.add(name)
+            try:
+                expected = (int(sample["width"]), int(sample["height"]))
+            except (KeyError, TypeError, ValueError):
+                expected = None
+            tasks.append((os.path.join(images_dir, name), expected))
+        self.check_images(tasks)
+        for path in sorted(list_files(images_dir, IMAGE_EXTS).values()):
+            if os.path.relpath(path, images_dir).replace(os.sep, "/") not in referenced:
+                self.add("orphan_image", path, "not in index")
+
+    def scan_split(self, img_dir: Path, lbl_dir: Path, check_label):
+        images = list_files(img_dir, IMAGE_EXTS)
+        labels = list_files(lbl_dir, {".txt"})
+        paired = sorted(images.keys() & labels.keys())
+        for key in sorted(images.keys() - labels.keys()):
+            self.add("orphan_image", images[key], "no label")
+        for key in sorted(labels.keys() - images.keys()):
+            self.add("orphan_label", labels[key], "no image")
+        self.check_images([(images[key], None) for key in paired])
+        self.labels += len(paired)
+        label_paths = [labels[key] for key in paired]
+        for key, result in zip(paired, run_threaded(check_label, label_paths, self.threads, self.chunk_size)):
+            if result:
+                self.add(result[0], labels[key], result[1], image=images[key])
+
+    def scan_root(self, root: Path, check_label):
+        splits = split_dirs(root)
+        if not splits:
+            print(f"Warning: no images/labels split dirs under {root}")
+        for split, img_dir, lbl_dir in splits:
+            self.scan_split(img_dir, lbl_dir, check_label)
+
+    def exclude(self):
+        return sorted(
+            {
+                os.path.abspath(issue.get("image", issue["path"]))
+                for issue in self.issues
+                if issue["kind"] not in REPORT_ONLY
+            }
+        )
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    out_path = Path(args.out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    scan = Scan(args.threads, args.chunk_size)
+    if args.index:
+        scan.scan_index(args.index, Path(args.images_dir))
+    for root in args.kp:
+        scan.scan_root(Path(root), check_kp_label)
+    for root in args.yolo:
+        scan.scan_root(Path(root), check_yolo_label)
+    elapsed = time.perf_counter() - start
+
+    counts = {}
+    for issue in scan.issues:
+        counts[issue["kind"]] = counts.get(issue["kind"], 0) + 1
+    exclude = scan.exclude()
+    report = {
+        "version": 1,
+        "images": scan.images,
+        "labels": scan.labels,
+        "seconds": elapsed,
+        "counts": counts,
+        "issues": scan.issues,
+        "exclude": exclude,
+    }
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+
+    files = scan.images + scan.labels
+    print(f"Scanned {scan.images} images and {scan.labels} labels in {elapsed:.2f}s ({files / max(elapsed, 1e-9):.0f} files/s)")
+    for kind, count in sorted(counts.items()):
+        example = next(i for i in scan.issues if i["kind"] == kind)
+        print(f"  {kind}: {count} (e.g. {example['path']}: {example.get('detail', '')})")
+    if not counts:
+        print("  no issues")
+    print(f"Excluded images: {len(exclude)}")
+    print(f"Report: {out_path} (pass to the exporters and train_board_kp.py with --exclude)")
+
+
+if __name__ == "__main__":
+    main()
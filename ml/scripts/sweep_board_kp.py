@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""Hyperparameter sweep around train_board_kp.py with successive halving.
+
+Trials run as parallel local train_board_kp.py processes, each pinned to its
+own --cores-per-trial CPUs (intra-op pool sized to match). All trials start
+with --min-epochs; after every rung only the best 1/--eta trials (by float32
+TFLite val_mae) continue from their best.keras for eta times the epochs, up
+to --max-epochs. Trials share one embedding cache (--cached-features) and
+read the same --data roots, so packed datasets and embeddings are built once.
+
+Search space: NAME=V1,V2,... (choices) or NAME=log:LO:HI / NAME=uniform:LO:HI /
+NAME=int:LO:HI. NAME is a train_board_kp.py flag without dashes (lr, batch,
+img, huber_delta, ...). All-choice spaces run as a full grid unless --trials
+is given; ranges need --trials (random search). Unknown arguments are passed
+through to every trial (e.g. --cached-features --quantize int8).
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from pareto import pareto_front
+
+
+TRAIN_SCRIPT = Path(__file__).resolve().parent / "train_board_kp.py"
+RANGE_KINDS = ["log", "uniform", "int"]
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Parallel successive-halving sweep for train_board_kp.py")
+    p.add_argument("--data", required=True, nargs="+", help="Dataset roots, passed to every trial")
+    p.add_argument("--out", default="runs/board_kp_sweep", help="Sweep directory")
+    p.add_argument("--space", required=True, nargs="+", help="NAME=V1,V2 or NAME=log|uniform|int:LO:HI")
+    p.add_argument("--trials", type=int, default=None, help="Random search with N trials (default: full grid)")
+    p.add_argument("--min-epochs", type=int, default=5, help="Epochs of the first rung")
+    p.add_argument("--max-epochs", type=int, default=80, help="Epochs of the last rung")
+    p.add_argument("--eta", type=int, default=3, help="Keep the best 1/eta trials per rung")
+    p.add_argument("--cores-per-trial", type=int, default=2, help="CPU cores per trial process")
+    p.add_argument("--parallel", type=int, default=None, help="Concurrent trials (default: cores // cores-per-trial)")
+    p.add_argument("--seed", type=int, default=42)
+    args, train_args = p.parse_known_args(argv)
+    if args.eta < 2:
+        p.error("--eta must be >= 2")
+    if args.min_epochs < 1 or args.max_epochs < args.min_epochs:
+        p.error("need 1 <= --min-epochs <= --max-epochs")
+    return args, train_args
+
+
+def parse_space(specs):
+    """{'lr': ('log', 1e-4, 3e-3), 'batch': ('choice', [16, 32]), ...}."""
+    space = {}
+    for spec in specs:
+        name, sep, value = spec.partition("=")
+        if not sep or not name:
+            raise SystemExit(f"Bad --space entry {spec!r} (expected NAME=...)")
+        kind, sep, rest = value.partition(":")
+        if sep and kind in RANGE_KINDS:
+            try:
+                lo, hi = (float(v) for v in rest.split(":"))
+            except ValueError:
+                raise SystemExit(f"Bad range in --space {spec!r} (expected {kind}:LO:HI)") from None
+            space[name] = (kind, lo, hi)
+        else:
+            space[name] = ("choice", [parse_value(v) for v in value.split(",")])
+    return space
+
+
+def parse_value(text):
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+
+def sample_configs(space, trials, seed):
+    names = sorted(space)
+    is_grid = all(space[n][0] == "choice" for n in names)
+    if trials is None:
+        if not is_grid:
+            raise SystemExit("Ranges in --space need --trials (random search)")
+        return [dict(zip(names, values)) for values in itertools.product(*(space[n][1] for n in names))]
+
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(trials):
+        config = {}
+        for name in names:
+            kind = space[name][0]
+            if kind == "choice":
+                config[name] = rng.choice(space[name][1])
+            elif kind == "log":
+                lo, hi = space[name][1:]
+                config[name] = float(math.exp(rng.uniform(math.log(lo), math.log(hi))))
+            elif kind == "uniform":
+                config[name] = rng.uniform(*space[name][1:])
+            else:
+                config[name] = rng.randint(int(space[name][1]), int(space[name][2]))
+        configs.append(config)
+    return configs
+
+
+def rung_epochs(min_epochs, max_epochs, eta):
+    """Cumulative epochs per rung: min, min*eta, ... capped at max."""
+    epochs = [min_epochs]
+    while epochs[-1] < max_epochs:
+        epochs.append(min(epochs[-1] * eta, max_epochs))
+    return epochs
+
+
+def core_slots(cores_per_trial, parallel):
+    """Disjoint CPU sets, one per concurrent trial."""
+    if hasattr(os, "sched_getaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = list(range(os.cpu_count() or 1))
+    if parallel is None:
+        parallel = max(1, len(cpus) // cores_per_trial)
+    slots = []
+    for i in range(parallel):
+        chunk = cpus[i * cores_per_trial : (i + 1) * cores_per_trial]
+        # More slots than cores: share round-robin rather than refuse
+        slots.append(chunk or [cpus[(i * cores_per_trial + j) % len(cpus)] for j in range(cores_per_trial)])
+    return slots
+
+
+class Trial:
+    def __init__(self, trial_id, config):
+        self.id = trial_id
+        self.config = config
+        self.dir = None
+        self.epochs = 0
+        self.rung = -1
+        self.val_mae = None
+        self.val_score_acc = None
+        self.variants = {}
+        self.seconds = 0.0
+        self.error = None
+
+    @property
+    def best_path(self):
+        return self.dir / f"r{self.rung}" / "best.keras"
+
+    def record(self):
+        return {
+            "trial": self.id,
+            "config": self.config,
+            "rung": self.rung,
+            "epochs": self.epochs,
+            "val_mae": self.val_mae,
+            "val_score_acc": self.val_score_acc,
+            "seconds": self.seconds,
+            "variants": self.variants,
+            "dir": str(self.dir),
+            "error": self.error,
+        }
+
+
+def trial_command(trial, rung, epochs, args, train_args, cache_dir, cores):
+    cmd = [
+        sys.executable,
+        str(TRAIN_SCRIPT),
+        "--data",
+        *args.data,
+        "--out",
+        str(trial.dir),
+        "--version",
+        f"r{rung}",
+        "--epochs",
+        str(epochs - trial.epochs),
+        "--seed",
+        str(args.seed),
+        "--cache-dir",
+        str(cache_dir),
+        "--intra-op-threads",
+        str(len(cores)),
+        "--inter-op-threads",
+        "1",
+    ]
+    for name, value in trial.config.items():
+        cmd += [f"--{name.replace('_', '-')}", str(value)]
+    if trial.rung >= 0:
+        cmd += ["--init-weights", str(trial.best_path)]
+    return cmd + train_args
+
+
+def read_result(run_dir: Path):
+    with open(run_dir / "meta.json", "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    return {
+        mode: {k: info[k] for k in ["file", "size_bytes", "val_mae", "val_score_acc"]}
+        for mode, info in meta["variants"].items()
+    }
+
+
+def run_rung(trials, rung, epochs, args, train_args, cache_dir, slots):
+    """Run (or continue) trials up to `epochs`, at most len(slots) at a time."""
+    pending = list(trials)
+    running = {}
+    free = list(range(len(slots)))
+    while pending or running:
+        while pending and free:
+            trial, slot = pending.pop(0), free.pop(0)
+            cores = slots[slot]
+            cmd = trial_command(trial, rung, epochs, args, train_args, cache_dir, cores)
+            trial.dir.mkdir(parents=True, exist_ok=True)
+            log = open(trial.dir / f"r{rung}.log", "w", encoding="utf-8")
+            # Pin the child to its cores so parallel trials do not fight over them
+            pin = (lambda c=cores: os.sched_setaffinity(0, c)) if hasattr(os, "sched_setaffinity") else None
+            proc = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT, preexec_fn=pin)
+            running[proc] = (trial, slot, log, time.perf_counter())
+        time.sleep(0.2)
+        for proc in [proc for proc in running if proc.poll() is not None]:
+            trial, slot, log, start = running.pop(proc)
+            log.close()
+            free.append(slot)
+            trial.seconds += time.perf_counter() - start
+            if proc.returncode != 0:
+                trial.error = f"exit {proc.returncode} in rung {rung}, see {trial.dir / f'r{rung}.log'}"
+                print(f"  {trial.id}: failed ({trial.error})")
+                continue
+            trial.rung = rung
+            trial.epochs = epochs
+            trial.variants = read_result(trial.dir / f"r{rung}")
+            trial.val_mae = trial.variants["none"]["val_mae"]
+            trial.val_score_acc = trial.variants["none"]["val_score_acc"]
+            print(f"  {trial.id}: val_mae {trial.val_mae:.5f} score acc {trial.val_score_acc:.4f} {trial.config}")
+
+
+def main(argv=None):
+    args, train_args = parse_args(argv)
+    if not TRAIN_SCRIPT.exists():
+        raise SystemExit(f"Missing {TRAIN_SCRIPT}")
+    space = parse_space(args.space)
+    configs = sample_configs(space, args.trials, args.seed)
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    cache_dir = out_dir / "feature_cache"
+    slots = core_slots(args.cores_per_trial, args.parallel)
+    rungs = rung_epochs(args.min_epochs, args.max_epochs, args.eta)
+
+    trials = [Trial(f"t{i:03d}", config) for i, config in enumerate(configs)]
+    for trial in trials:
+        trial.dir = out_dir / trial.id
+    print(
+        f"Sweep: {len(trials)} trials, rungs {rungs} epochs, eta {args.eta}, "
+        f"{len(slots)} parallel x {args.cores_per_trial} cores"
+    )
+
+    start = time.perf_counter()
+    alive = trials
+    for rung, epochs in enumerate(rungs):
+        print(f"Rung {rung}: {len(alive)} trials to {epochs} epochs")
+        run_rung(alive, rung, epochs, args, train_args, cache_dir, slots)
+        alive = sorted((t for t in alive if t.error is None), key=lambda t: t.val_mae)
+        if rung < len(rungs) - 1:
+            alive = alive[: max(1, len(alive) // args.eta)]
+        if not alive:
+            break
+
+    done = sorted((t for t in trials if t.val_mae is not None), key=lambda t: (-t.rung, t.val_mae))
+    points = [
+        {"trial": t.id, "quantize": mode, **info, "config": t.config}
+        for t in done
+        if t.rung == len(rungs) - 1
+        for mode, info in t.variants.items()
+    ]
+    report = {
+        "version": 1,
+        "space": {name: list(spec[1:]) if spec[0] != "choice" else spec[1] for name, spec in space.items()},
+        "rungs": rungs,
+        "eta": args.eta,
+        "cores_per_trial": args.cores_per_trial,
+        "parallel": len(slots),
+        "train_args": train_args,
+        "seconds": time.perf_counter() - start,
+        "leaderboard": [t.record() for t in done],
+        "failed": [t.record() for t in trials if t.error is not None],
+        "pareto": pareto_front(points, cost=lambda p: p["size_bytes"]),
+    }
+    with open(out_dir / "leaderboard.json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Leaderboard (rung, epochs, val_mae) after {report['seconds']:.0f}s:")
+    for t in done[:10]:
+        print(f"  {t.id} r{t.rung} {t.epochs:3d} ep  mae {t.val_mae:.5f}  acc {t.val_score_acc:.4f}  {t.config}")
+    print("Pareto front (TFLite size vs val_mae):")
+    for point in report["pareto"]:
+        print(
+            f"  {point['trial']} {point['quantize']:8s} {point['size_bytes'] / 1e6:6.2f} MB  "
+            f"mae {point['val_mae']:.5f}  {point['config']}"
+        )
+    print(f"Report: {out_dir / 'leaderboard.json'}")
+
+
+if __name__ == "__main__":
+    main()
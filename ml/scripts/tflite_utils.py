@@ -0,0 +1,95 @@
+"""TFLite conversion and interpreter helpers shared by the board keypoint scripts.
+
+TensorFlow is imported on first use (import_tf), so scripts that only need
+QUANTIZE_MODES or the NumPy helpers at argument-parsing time stay fast.
+"""
+import numpy as np
+
+
+QUANTIZE_MODES = ["none", "fp16", "dynamic", "int8"]
+
+
+def import_tf():
+    try:
+        import tensorflow as tf
+    except Exception as exc:
+        raise SystemExit("tensorflow missing. Install with: pip install tensorflow") from exc
+    return tf
+
+
+def convert_saved_model(saved_model_dir, mode="none", representative_data=None):
+    """Convert a SavedModel to TFLite bytes; int8 needs a representative_data() generator."""
+    tf = import_tf()
+    converter = tf.lite.TFLiteConverter.from_saved_model(str(saved_model_dir))
+    if mode == "fp16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif mode == "dynamic":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif mode == "int8":
+        if representative_data is None:
+            raise ValueError("int8 quantization needs a representative dataset")
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_data
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        # uint8 RGB in (matches camera bytes), float32 keypoints out
+        converter.inference_input_type = tf.uint8
+    elif mode != "none":
+        raise ValueError(f"Unknown quantize mode: {mode}")
+    return converter.convert()
+
+
+def make_interpreter(model_path=None, model_content=None, num_threads=None):
+    tf = import_tf()
+    interpreter = tf.lite.Interpreter(model_path=model_path, model_content=model_content, num_threads=num_threads)
+    interpreter.allocate_tensors()
+    return interpreter
+
+
+def tensor_meta(detail):
+    scale, zero_point = detail.get("quantization", (0.0, 0))
+    return {
+        "shape": [int(v) for v in detail["shape"]],
+        "dtype": np.dtype(detail["dtype"]).name,
+        "scale": float(scale),
+        "zero_point": int(zero_point),
+    }
+
+
+def io_meta(interpreter):
+    return {
+        "input": tensor_meta(interpreter.get_input_details()[0]),
+        "output": tensor_meta(interpreter.get_output_details()[0]),
+    }
+
+
+def quantize_input(x, detail):
+    """Map float32 0..1 input to the tensor's dtype using its scale/zero-point."""
+    dtype = np.dtype(detail["dtype"])
+    if dtype == np.float32:
+        return x.astype(np.float32)
+    scale, zero_point = detail["quantization"]
+    if not scale:
+        return x.astype(dtype)
+    info = np.iinfo(dtype)
+    q = np.round(x / scale + zero_point)
+    return np.clip(q, info.min, info.max).astype(dtype)
+
+
+def dequantize_output(y, detail):
+    dtype = np.dtype(detail["dtype"])
+    if dtype == np.float32:
+        return y
+    scale, zero_point = detail["quantization"]
+    if not scale:
+        return y.astype(np.float32)
+    return (y.astype(np.float32) - zero_point) * scale
+
+
+def run_interpreter(interpreter, x):
+    """Run one batch-1 float input through the interpreter, returning float outputs."""
+    input_detail = interpreter.get_input_details()[0]
+    output_detail = interpreter.get_output_details()[0]
+    interpreter.set_tensor(input_detail["index"], quantize_input(x, input_detail))
+    interpreter.invoke()
+    return dequantize_output(interpreter.get_tensor(output_detail["index"]), output_detail)
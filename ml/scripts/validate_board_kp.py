@@ -1,45 +1,153 @@
 #!/usr/bin/env python3
 import argparse
+import csv
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 try:
-    import tensorflow as tf
+    import numpy as np
 except Exception as exc:
-    raise SystemExit("tensorflow missing. Install with: pip install tensorflow") from exc
+    raise SystemExit("numpy missing. Install with: pip install numpy") from exc
+
+from board_kp_data import find_split_dirs, list_samples
+from board_score import score_accuracy
+from tflite_utils import import_tf, make_interpreter, run_interpreter
 
 
 ORDER = ["20_top", "6_right", "3_bottom", "11_left"]
+IMAGE_EXTS = [".jpg", ".jpeg", ".png", ".webp"]
 
 
-def parse_args():
+def parse_args(argv=None):
     p = argparse.ArgumentParser(description="Validate board keypoint tflite output")
     p.add_argument("--model", required=True, help="Path to board_kp_*.tflite")
-    p.add_argument("--image", required=True, help="Image path")
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--image", help="Image path")
+    src.add_argument("--dir", help="Image directory or labeled dataset root (export_board_kp.py layout)")
     p.add_argument("--img", type=int, default=320)
-    return p.parse_args()
+    p.add_argument("--split", default="val", help="Split to use when --dir is a dataset root")
+    p.add_argument("--out", default=None, help="Write per-image predictions to .csv or .json")
+    p.add_argument("--workers", type=int, default=4, help="Threads for decode/resize")
+    p.add_argument("--prefetch", type=int, default=16, help="Max decoded images waiting for the interpreter")
+    p.add_argument("--threads", type=int, default=None, help="Interpreter num_threads")
+    return p.parse_args(argv)
 
 
 def load_image(path, img_size):
+    # Returns the batch-1 model input plus the original (width, height)
+    tf = import_tf()
     data = tf.io.read_file(path)
     img = tf.image.decode_image(data, channels=3, expand_animations=False)
+    height, width = int(img.shape[0]), int(img.shape[1])
     img = tf.image.convert_image_dtype(img, tf.float32)
     img = tf.image.resize(img, [img_size, img_size])
-    return img
-
-
-def main():
-    args = parse_args()
-    img = load_image(args.image, args.img)
-    input_data = tf.expand_dims(img, 0).numpy()
-
-    interpreter = tf.lite.Interpreter(model_path=args.model)
-    interpreter.allocate_tensors()
-    input_details = interpreter.get_input_details()
-    output_details = interpreter.get_output_details()
-
-    interpreter.set_tensor(input_details[0]["index"], input_data)
-    interpreter.invoke()
-    output = interpreter.get_tensor(output_details[0]["index"]).reshape(-1)
+    return tf.expand_dims(img, 0).numpy(), (width, height)
+
+
+def collect_items(root: Path, split):
+    """Return [(path, labels or None)] for a dataset root or a plain image directory."""
+    img_dir, lbl_dir = find_split_dirs(root, split)
+    if split == "val" and (not img_dir or not lbl_dir):
+        img_dir, lbl_dir = find_split_dirs(root, "valid")
+    if img_dir and lbl_dir:
+        return list_samples(img_dir, lbl_dir)
+    paths = sorted(p for p in root.rglob("*") if p.suffix.lower() in IMAGE_EXTS)
+    return [(str(p), None) for p in paths]
+
+
+def prefetch_map(fn, items, workers, depth):
+    """Ordered map over a thread pool with at most `depth` results in flight."""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= depth:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if len(values) else float("nan")
+
+
+def write_predictions(path: Path, rows):
+    if path.suffix.lower() == ".json":
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+        return
+    keys = list(rows[0].keys()) if rows else ["path"]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=keys)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def validate_dir(args):
+    items = collect_items(Path(args.dir), args.split)
+    if not items:
+        raise SystemExit(f"No images found in {args.dir}")
+
+    interpreter = make_interpreter(model_path=args.model, num_threads=args.threads)
+
+    def _prepare(item):
+        path, labels = item
+        x, size = load_image(path, args.img)
+        return path, labels, x, size
+
+    rows = []
+    errors = [[] for _ in ORDER]
+    preds, truths = [], []
+    start = time.perf_counter()
+    for path, labels, x, (width, height) in prefetch_map(_prepare, items, args.workers, args.prefetch):
+        pred = run_interpreter(interpreter, x).reshape(-1)
+        if pred.size < 8:
+            raise SystemExit(f"Unexpected output size: {pred.size}")
+        row = {"path": path, "width": width, "height": height}
+        for i, name in enumerate(ORDER):
+            row[f"{name}_x"] = float(pred[2 * i])
+            row[f"{name}_y"] = float(pred[2 * i + 1])
+        if labels is not None:
+            preds.append(pred[:8])
+            truths.append(labels)
+            for i, name in enumerate(ORDER):
+                dx = (pred[2 * i] - labels[2 * i]) * width
+                dy = (pred[2 * i + 1] - labels[2 * i + 1]) * height
+                err = float(np.hypot(dx, dy))
+                row[f"{name}_err_px"] = err
+                errors[i].append(err)
+        rows.append(row)
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    print(f"Validated {len(rows)} images in {elapsed:.1f}s ({len(rows) / elapsed:.1f} img/s)")
+    if errors[0]:
+        print("Pixel error per keypoint (mean / p95):")
+        for name, errs in zip(ORDER, errors):
+            print(f"  {name}: {float(np.mean(errs)):.2f} / {percentile(errs, 95):.2f}")
+        all_errs = [e for errs in errors for e in errs]
+        print(f"  all: {float(np.mean(all_errs)):.2f} / {percentile(all_errs, 95):.2f}")
+        preds = np.asarray(preds, dtype=np.float64)
+        truths = np.asarray(truths, dtype=np.float64)
+        print(f"MAE (normalized): {float(np.mean(np.abs(preds - truths))):.5f}")
+        print(f"Score accuracy (board probes): {score_accuracy(preds, truths):.4f}")
+    if args.out:
+        write_predictions(Path(args.out), rows)
+        print(f"Predictions: {args.out}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.dir:
+        validate_dir(args)
+        return
+
+    input_data, _ = load_image(args.image, args.img)
+
+    interpreter = make_interpreter(model_path=args.model, num_threads=args.threads)
+    output = run_interpreter(interpreter, input_data).reshape(-1)
 
     if output.size < 8:
         raise SystemExit(f"Unexpected output size: {output.size}")
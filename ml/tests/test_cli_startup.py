@@ -0,0 +1,79 @@
+"""Startup budget for the label-only ml.py commands; no command loads TensorFlow for --help.
+
+Run with: python3 -m unittest discover ml/tests
+"""
+import ast
+import statistics
+import subprocess
+import sys
+import time
+import unittest
+from pathlib import Path
+
+
+SCRIPTS = Path(__file__).resolve().parents[1] / "scripts"
+ML = SCRIPTS / "ml.py"
+sys.path.insert(0, str(SCRIPTS))
+
+from ml import COMMANDS, LABEL_COMMANDS  # noqa: E402
+
+
+HEAVY = {"numpy", "tensorflow", "keras", "roboflow", "PIL"}
+TF = {"tensorflow", "keras"}
+# Startup on top of a bare interpreter (which alone varies a lot between machines)
+BUDGET_MS = 100
+RUNS = 7
+
+
+def median_ms(cmd):
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def help_imports(command):
+    """Top-level packages imported by `ml COMMAND --help`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", str(ML), command, "--help"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {
+        line.rsplit("|", 1)[-1].strip().split(".")[0]
+        for line in proc.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+
+
+class CliStartupTest(unittest.TestCase):
+    def test_label_commands_skip_heavy_imports(self):
+        for command in LABEL_COMMANDS:
+            imported = help_imports(command)
+            self.assertFalse(imported & HEAVY, f"{command} imports {sorted(imported & HEAVY)}")
+
+    def test_help_skips_tensorflow(self):
+        for command in COMMANDS:
+            imported = help_imports(command)
+            self.assertFalse(imported & TF, f"{command} --help imports {sorted(imported & TF)}")
+
+    def test_label_commands_start_fast(self):
+        baseline = median_ms([sys.executable, "-c", "pass"])
+        for command in LABEL_COMMANDS:
+            elapsed = median_ms([sys.executable, str(ML), command, "--help"]) - baseline
+            self.assertLess(elapsed, BUDGET_MS, f"{command} --help took {elapsed:.0f} ms over the interpreter")
+
+    def test_commands_accept_argv(self):
+        # Checked on the source: importing the TensorFlow commands here would defeat the point
+        for command, (module, _) in COMMANDS.items():
+            tree = ast.parse((SCRIPTS / f"{module}.py").read_text(encoding="utf-8"))
+            mains = [n for n in tree.body if isinstance(n, ast.FunctionDef) and n.name == "main"]
+            self.assertTrue(mains, f"{module}.py has no main()")
+            self.assertEqual([a.arg for a in mains[0].args.args], ["argv"], f"{module}.main must take argv")
+
+
+if __name__ == "__main__":
+    unittest.main()
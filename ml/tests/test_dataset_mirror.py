@@ -0,0 +1,164 @@
+"""Offline tests for the dataset archive mirror (local stand-in backends).
+
+Run with: python3 -m unittest discover ml/tests
+"""
+import contextlib
+import hashlib
+import http.server
+import io
+import sys
+import tempfile
+import threading
+import unittest
+import zipfile
+from pathlib import Path
+
+
+SCRIPTS = Path(__file__).resolve().parents[1] / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+from dataset_mirror import DatasetKey, DirBackend, HttpBackend, Mirror, extract  # noqa: E402
+
+
+KEY = DatasetKey("ws", "darts", 3, "yolov8")
+
+
+def make_archive(path: Path, files=40):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("data.yaml", "names: [a, b]\n")
+        for i in range(files):
+            zf.writestr(f"train/labels/s{i}.txt", f"0 0.5 0.5 0.1 0.1\n{i}\n")
+            zf.writestr(f"train/images/s{i}.jpg", bytes(range(256)) * (i + 1))
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+class CountingBackend(DirBackend):
+    """Local stand-in that counts opens and can cut the transfer after `fail_after` bytes."""
+
+    def __init__(self, root, fail_after=None):
+        super().__init__(root)
+        self.fail_after = fail_after
+        self.opens = []
+
+    def open(self, path, offset):
+        f, start, total = super().open(path, offset)
+        self.opens.append(start)
+        if self.fail_after is None:
+            return f, start, total
+        data = f.read(self.fail_after)
+        f.close()
+        return _Cut(data), start, total
+
+
+class _Cut(io.BytesIO):
+    def read(self, size=-1):
+        data = super().read(size)
+        if not data:
+            raise ConnectionResetError("stand-in connection dropped")
+        return data
+
+
+class RangeHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        path = Path(self.translate_path(self.path))
+        if not path.is_file():
+            self.send_error(404)
+            return
+        data = path.read_bytes()
+        start = int(self.headers["Range"][len("bytes=") :].split("-")[0]) if self.headers["Range"] else 0
+        self.send_response(206 if start else 200)
+        if start:
+            self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+        self.send_header("Content-Length", str(len(data) - start))
+        self.end_headers()
+        self.wfile.write(data[start:])
+
+
+class MirrorTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        self.server_root = self.tmp / "server"
+        self.sha256 = make_archive(self.server_root / "ws" / "darts" / "3" / "yolov8.zip")
+        self.mirror = Mirror(self.tmp / "mirror")
+        for redirect in (contextlib.redirect_stdout, contextlib.redirect_stderr):
+            quiet = redirect(io.StringIO())
+            quiet.__enter__()
+            self.addCleanup(quiet.__exit__, None, None, None)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_cache_hit_skips_fetch(self):
+        backend = CountingBackend(self.server_root)
+        blob, fetched = self.mirror.fetch(KEY, backend)
+        self.assertEqual(blob, self.mirror.blob_path(self.sha256))
+        self.assertEqual(fetched, blob.stat().st_size)
+        blob, fetched = self.mirror.fetch(KEY, backend, expected_sha256=self.sha256)
+        self.assertEqual(fetched, 0)
+        self.assertEqual(backend.opens, [0])
+
+    def test_corrupt_cache_is_refetched(self):
+        blob, _ = self.mirror.fetch(KEY, CountingBackend(self.server_root))
+        data = bytearray(blob.read_bytes())
+        data[100] ^= 0xFF
+        blob.write_bytes(bytes(data))
+        backend = CountingBackend(self.server_root)
+        blob, fetched = self.mirror.fetch(KEY, backend)
+        self.assertEqual(backend.opens, [0])
+        self.assertEqual(hashlib.sha256(blob.read_bytes()).hexdigest(), self.sha256)
+
+    def test_interrupted_transfer_resumes(self):
+        with self.assertRaises(ConnectionResetError):
+            self.mirror.fetch(KEY, CountingBackend(self.server_root, fail_after=5000))
+        backend = CountingBackend(self.server_root)
+        blob, fetched = self.mirror.fetch(KEY, backend)
+        self.assertEqual(backend.opens, [5000])
+        self.assertEqual(fetched, blob.stat().st_size - 5000)
+        self.assertEqual(blob.stem, self.sha256)
+        self.assertFalse(self.mirror.part_path(KEY).exists())
+
+    def test_checksum_pin_mismatch(self):
+        with self.assertRaises(SystemExit):
+            self.mirror.fetch(KEY, CountingBackend(self.server_root), expected_sha256="0" * 64)
+        self.assertIsNone(self.mirror.cached(KEY))
+
+    def test_http_range_resume(self):
+        server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), lambda *a: RangeHandler(*a, directory=str(self.server_root))
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            part = self.mirror.part_path(KEY)
+            part.parent.mkdir(parents=True)
+            archive = (self.server_root / "ws" / "darts" / "3" / "yolov8.zip").read_bytes()
+            part.write_bytes(archive[:3000])
+            backend = HttpBackend(f"http://127.0.0.1:{server.server_address[1]}")
+            blob, fetched = self.mirror.fetch(KEY, backend)
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(fetched, len(archive) - 3000)
+        self.assertEqual(blob.stem, self.sha256)
+
+    def test_extract_once(self):
+        blob, _ = self.mirror.fetch(KEY, CountingBackend(self.server_root))
+        out = self.tmp / "out"
+        self.assertEqual(extract(blob, out, self.sha256, threads=4), 81)
+        self.assertEqual((out / "train" / "labels" / "s7.txt").read_text(), "0 0.5 0.5 0.1 0.1\n7\n")
+        self.assertEqual(extract(blob, out, self.sha256, threads=4), 0)
+
+        foreign = self.tmp / "foreign"
+        foreign.mkdir()
+        (foreign / "keep.txt").write_text("x")
+        with self.assertRaises(SystemExit):
+            extract(blob, foreign, self.sha256)
+        self.assertTrue((foreign / "keep.txt").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""Columnar label cache: parsing and invalidation.
+
+Run with: python3 -m unittest discover ml/tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+SCRIPTS = Path(__file__).resolve().parents[1] / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+from label_cache import cache_dir_for, value_labels, yolo_labels  # noqa: E402
+
+
+KP = "0.1 0.2 0.3 0.4 0.5 0.6 0.7 0.8\n"
+
+
+class LabelCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.labels = Path(self._tmp.name) / "labels" / "train"
+        (self.labels / "shard_001").mkdir(parents=True)
+        (self.labels / "a.txt").write_text(KP)
+        (self.labels / "shard_001" / "b.txt").write_text(KP.replace("0.1", "0.9"))
+        (self.labels / "bad.txt").write_text("0.1 0.2\n")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def values(self):
+        keys, values = value_labels(self.labels, 8)
+        return {k: v.tolist() for k, v in zip(keys.tolist(), values)}
+
+    def test_values_recursive_and_cached(self):
+        rows = self.values()
+        self.assertEqual(sorted(rows), ["a", "shard_001/b"])
+        self.assertEqual(rows["shard_001/b"][0], 0.9)
+        self.assertTrue((cache_dir_for(self.labels) / "values8.json").exists())
+        self.assertEqual(self.values(), rows)
+
+    def test_in_place_rewrite_invalidates(self):
+        self.values()
+        path = self.labels / "a.txt"
+        dir_mtimes = [os.stat(d).st_mtime_ns for d in (self.labels, self.labels / "shard_001")]
+        # Same size, same directory mtimes: only the file's own mtime changes
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(KP.replace("0.2", "0.3"))
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        self.assertEqual([os.stat(d).st_mtime_ns for d in (self.labels, self.labels / "shard_001")], dir_mtimes)
+        self.assertEqual(self.values()["a"][1], 0.3)
+
+    def test_added_and_removed_files(self):
+        self.values()
+        (self.labels / "shard_001" / "c.txt").write_text(KP)
+        (self.labels / "a.txt").unlink()
+        self.assertEqual(sorted(self.values()), ["shard_001/b", "shard_001/c"])
+
+    def test_yolo_rewrite_invalidates(self):
+        yolo_dir = Path(self._tmp.name) / "train" / "labels"
+        yolo_dir.mkdir(parents=True)
+        path = yolo_dir / "img.txt"
+        path.write_text("1 0.5 0.5 0.1 0.1\n")
+        self.assertEqual(yolo_labels(yolo_dir).cls.tolist(), [1])
+        path.write_text("2 0.5 0.5 0.1 0.1\n")
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        self.assertEqual(yolo_labels(yolo_dir).cls.tolist(), [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+"""Pareto front and MAE-bar picks behind the sweep leaderboard and family.json.
+
+Run with: python3 -m unittest discover ml/tests
+"""
+import sys
+import unittest
+from pathlib import Path
+
+
+SCRIPTS = Path(__file__).resolve().parents[1] / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+from family_board_kp import latency, pick_id  # noqa: E402
+from pareto import cheapest_within, pareto_front  # noqa: E402
+
+
+def model(mid, mae, **ms_by_threads):
+    return {
+        "id": mid,
+        "val_mae": mae,
+        "latency_ms": {t.lstrip("t"): {"p50": ms} for t, ms in ms_by_threads.items()},
+    }
+
+
+def ids(items):
+    return [m["id"] for m in items]
+
+
+class ParetoTest(unittest.TestCase):
+    def test_front_drops_dominated(self):
+        models = [
+            model("big", 0.010, t1=9.0),
+            model("mid", 0.015, t1=5.0),
+            model("worse", 0.020, t1=6.0),
+            model("small", 0.030, t1=2.0),
+        ]
+        self.assertEqual(ids(pareto_front(models, latency("1", "p50"))), ["small", "mid", "big"])
+
+    def test_ties(self):
+        models = [
+            model("a", 0.02, t1=3.0),
+            model("same_cost_better", 0.01, t1=3.0),
+            model("exact_dup", 0.01, t1=3.0),
+            model("slower_same_mae", 0.01, t1=4.0),
+        ]
+        cost = latency("1", "p50")
+        # Equal cost: lower error wins; full ties keep the first in input order
+        self.assertEqual(ids(pareto_front(models, cost)), ["same_cost_better"])
+        self.assertEqual(cheapest_within(models, cost, 0.02)["id"], "same_cost_better")
+
+    def test_missing_latency_is_skipped(self):
+        models = [
+            model("untimed", 0.001),
+            model("one_thread_only", 0.005, t1=1.0),
+            model("both", 0.02, t1=4.0, t4=2.0),
+            model("nan_mae", float("nan"), t1=0.5, t4=0.5),
+        ]
+        self.assertEqual(ids(pareto_front(models, latency("1", "p50"))), ["one_thread_only"])
+        self.assertEqual(ids(pareto_front(models, latency("4", "p50"))), ["both"])
+        self.assertEqual(pick_id(models, latency("4", "p50"), 0.01), None)
+        self.assertEqual(pick_id(models, latency("4", "p50"), 0.03), "both")
+        self.assertEqual(pareto_front([], latency("1", "p50")), [])
+
+    def test_size_cost(self):
+        points = [{"id": "int8", "size_bytes": 700, "val_mae": 0.02}, {"id": "f32", "size_bytes": 2000, "val_mae": 0.02}]
+        self.assertEqual(ids(pareto_front(points, cost=lambda p: p["size_bytes"])), ["int8"])
+
+
+if __name__ == "__main__":
+    unittest.main()
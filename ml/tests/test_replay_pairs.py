@@ -0,0 +1,67 @@
+"""Frame pairing for the diff-detector replay.
+
+Run with: python3 -m unittest discover ml/tests
+"""
+import sys
+import unittest
+from pathlib import Path
+
+
+SCRIPTS = Path(__file__).resolve().parents[1] / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+from replay_diff_detect import build_pairs  # noqa: E402
+
+
+SNAP = {"centerX": 0.5, "centerY": 0.5, "scale": 0.9, "rotationDeg": 0}
+
+
+def sample(name, captured_at, snap=SNAP, annotated=True, size=(640, 480)):
+    s = {
+        "id": name,
+        "fileName": f"{name}.jpg",
+        "width": size[0],
+        "height": size[1],
+        "capturedAt": captured_at,
+        "settingsSnapshot": snap,
+    }
+    if annotated:
+        s["annotation"] = {"x": 0.4, "y": 0.6}
+    return s
+
+
+def names(pairs):
+    return [(baseline, s["fileName"]) for baseline, s in pairs]
+
+
+class BuildPairsTest(unittest.TestCase):
+    def test_previous_capture_by_time(self):
+        samples = [
+            sample("c", "2026-02-08T10:00:03Z"),
+            sample("a", "2026-02-08T10:00:01Z", annotated=False),
+            sample("b", "2026-02-08T10:00:02Z"),
+        ]
+        self.assertEqual(names(build_pairs(samples)), [("a.jpg", "b.jpg"), ("b.jpg", "c.jpg")])
+
+    def test_calibration_and_size_must_match(self):
+        moved = dict(SNAP, centerX=0.55)
+        samples = [
+            sample("a", "2026-02-08T10:00:01Z"),
+            sample("b", "2026-02-08T10:00:02Z", snap=moved),
+            sample("c", "2026-02-08T10:00:03Z", size=(480, 640)),
+            sample("d", "2026-02-08T10:00:04Z"),
+            sample("e", "2026-02-08T10:00:05Z", snap=moved),
+        ]
+        self.assertEqual(names(build_pairs(samples)), [("a.jpg", "d.jpg"), ("b.jpg", "e.jpg")])
+
+    def test_unannotated_samples_only_serve_as_baseline(self):
+        samples = [
+            sample("a", "2026-02-08T10:00:01Z"),
+            sample("b", "2026-02-08T10:00:02Z", annotated=False),
+            {"id": "x", "capturedAt": "2026-02-08T10:00:03Z", "settingsSnapshot": SNAP},
+        ]
+        self.assertEqual(build_pairs(samples), [])
+
+
+if __name__ == "__main__":
+    unittest.main()